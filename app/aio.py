@@ -0,0 +1,352 @@
+"""Asyncio serving path for the processing API, built on aiohttp.
+
+Uploads are received and responses written on the event loop, so slow
+clients only cost a coroutine. Decoding, pipeline runs and encoding block,
+so they run on a bounded thread pool. The processor, image handles, caches
+and jobs are shared with the Flask application in :mod:`app.routes`.
+
+Serves /api/operations, /api/images, /api/process, /api/process/stream,
+/api/process_batch, and the 'ref' results and jobs they hand out under
+/api/results and /api/jobs; see ``run_async.py``.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
+import tempfile
+import time
+from aiohttp import web
+from multidict import MultiDict
+from . import routes
+from .image_processing.cancellation import Cancelled, CancellationToken
+from .routes import RequestError, ProcessOptions, ProcessPlan
+
+logger = logging.getLogger(__name__)
+
+# Largest multipart body accepted; other bodies only carry form fields and
+# keep aiohttp's 1 MB limit
+MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+
+# Uploaded files larger than this wait on disk rather than in memory until a
+# handler thread reads them, as Werkzeug does for the Flask application
+SPOOL_BYTES = 512 * 1024
+
+# Twice the scheduler's slots, so uploads keep being decoded and results
+# encoded while every slot is running a pipeline
+executor = ThreadPoolExecutor(max_workers=2 * routes.processor.scheduler.max_concurrent,
+                              thread_name_prefix='aio')
+
+def error_response(error: RequestError) -> web.Response:
+    return web.json_response({'success': False, 'error': error.message}, status=error.status)
+
+def server_error(message: str) -> web.Response:
+    return web.json_response({'success': False, 'error': message}, status=500)
+
+async def blocking(function, *args):
+    """Run a blocking call on :data:`executor`."""
+    return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+
+async def read_form(request: web.Request):
+    """Receive a request's form fields and uploaded files.
+
+    Multipart bodies are read part by part as they arrive, and files are
+    spooled to temporary files, so uploads in progress hold little memory.
+
+    Returns:
+        Tuple[MultiDict, MultiDict]: The text fields, and the uploads as
+            (filename, file) pairs, positioned at the start.
+
+    Raises:
+        RequestError: If the body exceeds :data:`MAX_UPLOAD_BYTES`.
+    """
+    fields, files = MultiDict(), MultiDict()
+    if not request.content_type.startswith('multipart/'):
+        fields.extend(await request.post())
+        return fields, files
+
+    received = 0
+    reader = await request.multipart()
+    async for part in reader:
+        if part.filename is None:
+            text = await part.text()
+            received += len(text)
+            fields.add(part.name, text)
+        else:
+            spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+            files.add(part.name, (part.filename, spool))
+            while chunk := await part.read_chunk():
+                received += len(chunk)
+                if received > MAX_UPLOAD_BYTES:
+                    break
+                spool.write(chunk)
+            spool.seek(0)
+        if received > MAX_UPLOAD_BYTES:
+            close_uploads(files)
+            raise RequestError('Upload too large', 413)
+    return fields, files
+
+def close_uploads(files: MultiDict) -> None:
+    """Delete the temporary files of the uploads :func:`read_form` received."""
+    for _, spool in files.values():
+        spool.close()
+
+def read_upload(files: MultiDict, name: str = 'image') -> bytes:
+    """Return the bytes of a single uploaded file.
+
+    Reads from disk for large uploads, so call it through :func:`blocking`.
+
+    Raises:
+        RequestError: If the file is missing.
+    """
+    if name not in files:
+        raise RequestError('No image provided')
+    filename, spool = files[name]
+    if filename == '':
+        raise RequestError('No image selected')
+    return spool.read()
+
+def payload_response(*args, etag=None) -> web.Response:
+    """Serialize a result with :func:`routes.encode_payload` into a response."""
+    body, content_type = routes.encode_payload(*args)
+    response = web.Response(body=body, headers={'Content-Type': content_type})
+    if etag is not None:
+        response.headers['ETag'] = f'W/"{etag}"'
+    return response
+
+async def get_operations(request: web.Request) -> web.Response:
+    """Return the list of available image processing operations."""
+    # Built on first use, which loads every operation
+    body, etag = await blocking(routes.operation_catalog)
+    if any(tag.value == etag for tag in request.if_none_match or ()):
+        return web.Response(status=304, headers={'ETag': f'"{etag}"'})
+    return web.Response(body=body, content_type='application/json', headers={
+        'ETag': f'"{etag}"',
+        'Cache-Control': 'public, no-cache'
+    })
+
+async def upload_image(request: web.Request) -> web.Response:
+    """Decode an uploaded image once and return a handle for later requests."""
+    try:
+        _, files = await read_form(request)
+        try:
+            image_data = await blocking(read_upload, files)
+        finally:
+            close_uploads(files)
+        image, _ = await blocking(routes.decode_upload, image_data)
+    except RequestError as e:
+        return error_response(e)
+
+    return web.json_response(routes.register_image(image, image_data), status=201)
+
+async def read_process_request(request: web.Request):
+    """Parse an /api/process request without decoding its image.
+
+    Returns:
+        Tuple[ProcessOptions, Optional[str], Optional[bytes], str]: The
+            options, the image handle or upload, and the image's digest.
+
+    Raises:
+        RequestError: If the request is invalid.
+    """
+    fields, files = await read_form(request)
+    try:
+        options = ProcessOptions(fields)
+        handle = fields.get('image_handle')
+        image_data = None if handle else await blocking(read_upload, files)
+    finally:
+        close_uploads(files)
+    # Hashing a large upload takes a while
+    image_digest = await blocking(routes.source_digest, handle, image_data)
+    return options, handle, image_data, image_digest
+
+def disconnected(request: web.Request) -> bool:
+    transport = request.transport
+    return transport is None or transport.is_closing()
+
+async def next_line(request: web.Request, lines, cancel=None):
+    """Advance a blocking generator on :data:`executor`.
+
+    If the client goes away meanwhile, whether the handler is cancelled or
+    the connection is found closed, ``cancel`` is cancelled at once and the
+    generator is closed when the line in progress is done.
+    """
+    future = asyncio.ensure_future(blocking(next, lines, None))
+    try:
+        while not future.done():
+            await asyncio.wait({future}, timeout=0.1)
+            if not future.done() and disconnected(request):
+                raise ConnectionResetError('Client disconnected')
+        return future.result()
+    except BaseException:
+        if cancel is not None:
+            cancel.cancel()
+        future.add_done_callback(lambda _: lines.close())
+        raise
+
+async def stream(request: web.Request, lines, content_type: str, headers=None,
+                 cancel=None) -> web.StreamResponse:
+    """Write the strings a blocking generator yields as they become ready.
+
+    Each string is produced on :data:`executor` and written on the loop.
+    ``cancel``, the token of the work behind the generator, is cancelled
+    when the client disconnects, even while a string is being produced.
+    """
+    response = web.StreamResponse(headers={'Content-Type': content_type, **(headers or {})})
+    await response.prepare(request)
+    producing = False
+    try:
+        while True:
+            producing = True
+            line = await next_line(request, lines, cancel)
+            producing = False
+            if line is None:
+                break
+            await response.write(line.encode('utf-8'))
+    finally:
+        # Closing a generator that is idle between lines ends its work early;
+        # one busy on a line is closed by next_line once the line is done
+        if not producing:
+            lines.close()
+    await response.write_eof()
+    return response
+
+async def process_image(request: web.Request) -> web.Response:
+    """Process an image with the specified pipeline of operations.
+
+    Accepts the same fields and answers like the Flask endpoint.
+    """
+    def etag_matches(etag):
+        return any(tag.value == etag for tag in request.if_none_match or ())
+
+    try:
+        options, handle, image_data, image_digest = await read_process_request(request)
+        plan = await blocking(routes.plan_process, options, handle, image_data, image_digest, etag_matches)
+    except RequestError as e:
+        return error_response(e)
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        return server_error('An unexpected error occurred')
+
+    if plan.action == ProcessPlan.QUEUED:
+        return web.json_response(plan.queued_body(), status=202)
+    if plan.action == ProcessPlan.NOT_MODIFIED:
+        return web.Response(status=304, headers={'ETag': f'W/"{plan.etag}"'})
+    if plan.action == ProcessPlan.CACHED:
+        return payload_response(routes.CACHED_METADATA, plan.cached, {}, options.output_format,
+                                options.transport, etag=plan.etag)
+
+    token = routes.latest.begin(options.client_id)
+    try:
+        metadata, final_image, intermediate_results = await blocking(plan.render, token)
+        # Base64 encoding a large result is worth taking off the loop too
+        return await blocking(lambda: payload_response(
+            metadata, final_image, intermediate_results, options.output_format,
+            options.transport, options.step_format, etag=plan.etag
+        ))
+    except Cancelled:
+        return web.json_response(routes.CANCELLED_ERROR, status=409)
+    except Exception as e:
+        logger.error(f"Error during image processing: {str(e)}")
+        return server_error('An error occurred during image processing')
+    finally:
+        routes.latest.end(options.client_id, token)
+
+async def process_batch(request: web.Request) -> web.StreamResponse:
+    """Process many images with one pipeline, streaming NDJSON lines."""
+    try:
+        fields, files = await read_form(request)
+        try:
+            uploads = files.getall('images', [])
+            if not uploads:
+                raise RequestError('No images provided')
+            pipeline_data, executor_kind, order, workers, max_edge = routes.read_batch_options(fields)
+            images = await blocking(lambda: [spool.read() for _, spool in uploads])
+        finally:
+            close_uploads(files)
+    except RequestError as e:
+        return error_response(e)
+
+    filenames = [filename for filename, _ in uploads]
+    lines = routes.batch_lines(images, filenames, pipeline_data, executor_kind, order, workers, max_edge)
+    return await stream(request, lines, 'application/x-ndjson')
+
+async def process_image_stream(request: web.Request) -> web.StreamResponse:
+    """Process an image, streaming step results as server-sent events."""
+    try:
+        options, handle, image_data, image_digest = await read_process_request(request)
+        if options.transport == 'multipart':
+            raise RequestError('Streaming supports the json and ref transports')
+        plan = await blocking(routes.plan_process, options, handle, image_data, image_digest)
+    except RequestError as e:
+        return error_response(e)
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        return server_error('An unexpected error occurred')
+
+    if plan.action == ProcessPlan.QUEUED:
+        return web.json_response(plan.queued_body(), status=202)
+    if plan.action == ProcessPlan.CACHED:
+        return await stream(request, plan.events(), 'text/event-stream', {'Cache-Control': 'no-cache'})
+    token = routes.latest.begin(options.client_id) or CancellationToken()
+    return await stream(request, plan.events(token), 'text/event-stream', {'Cache-Control': 'no-cache'},
+                        cancel=token)
+
+def query_float(request: web.Request, name: str) -> float:
+    """Parse a numeric query parameter, 0 if missing or invalid as in Flask."""
+    try:
+        return float(request.query.get(name, 0))
+    except ValueError:
+        return 0.0
+
+async def get_result(request: web.Request) -> web.Response:
+    """Return an encoded image stored for the 'ref' transport."""
+    entry = routes.results.get(request.match_info['result_id'])
+    if entry is None:
+        return web.json_response(routes.UNKNOWN_RESULT, status=404)
+    data, mimetype = entry
+    return web.Response(body=data, content_type=mimetype, headers=routes.RESULT_HEADERS)
+
+async def wait_for_job(request: web.Request) -> str:
+    """Wait as long as the ``wait`` query parameter asks for the job to finish.
+
+    Polls on the loop rather than holding a thread of :data:`executor`.
+
+    Returns:
+        str: The job ID.
+    """
+    job_id = request.match_info['job_id']
+    job = routes.jobs.get(job_id)
+    deadline = time.monotonic() + min(query_float(request, 'wait'), routes.MAX_JOB_WAIT)
+    while job is not None and not job.finished and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    return job_id
+
+async def get_job(request: web.Request) -> web.Response:
+    """Return the status and progress of a job, long-polling with ``wait``."""
+    body, status = routes.job_status(await wait_for_job(request))
+    return web.json_response(body, status=status)
+
+async def delete_job(request: web.Request) -> web.Response:
+    """Cancel a queued or running job."""
+    body, status = routes.cancel_job(request.match_info['job_id'])
+    return web.json_response(body, status=status)
+
+async def get_job_result(request: web.Request) -> web.Response:
+    """Return the processed image of a finished job."""
+    # Base64 encoding a large result is worth taking off the loop
+    body, status = await blocking(routes.job_result, await wait_for_job(request))
+    return web.json_response(body, status=status)
+
+def create_aio_app() -> web.Application:
+    app = web.Application()
+    app.router.add_get('/api/operations', get_operations)
+    app.router.add_post('/api/images', upload_image)
+    app.router.add_post('/api/process', process_image)
+    app.router.add_post('/api/process/stream', process_image_stream)
+    app.router.add_post('/api/process_batch', process_batch)
+    # Where 'ref' results, refinements and queued runs are fetched from
+    app.router.add_get('/api/results/{result_id}', get_result)
+    app.router.add_get('/api/jobs/{job_id}', get_job)
+    app.router.add_delete('/api/jobs/{job_id}', delete_job)
+    app.router.add_get('/api/jobs/{job_id}/result', get_job_result)
+    return app
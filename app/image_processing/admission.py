@@ -0,0 +1,55 @@
+"""Admission control of pipelines based on their estimated cost."""
+
+from typing import Tuple
+import math
+
+class CostBudget:
+    """Limits on the estimated cost of pipelines accepted by the server.
+
+    Pipelines estimated within ``interactive_ms`` run as requested. Above
+    ``max_ms`` they are rejected outright. In between they are handled
+    according to ``over_budget``: queued as a background job ('async'),
+    run on a downscaled proxy that fits the interactive budget
+    ('downscale'), or rejected ('reject').
+
+    Args:
+        interactive_ms (float): Largest estimate run synchronously.
+        max_ms (float): Largest estimate accepted at all.
+        over_budget (str): One of 'async', 'downscale' or 'reject'.
+
+    Raises:
+        ValueError: If ``over_budget`` is not a known action.
+    """
+
+    RUN = 'run'
+    ASYNC = 'async'
+    DOWNSCALE = 'downscale'
+    REJECT = 'reject'
+
+    def __init__(self, interactive_ms: float = 5000, max_ms: float = 300000,
+                 over_budget: str = DOWNSCALE):
+        if over_budget not in (CostBudget.ASYNC, CostBudget.DOWNSCALE, CostBudget.REJECT):
+            raise ValueError(f"Unsupported over-budget action: {over_budget}")
+        self.interactive_ms = interactive_ms
+        self.max_ms = max_ms
+        self.over_budget = over_budget
+
+    def decide(self, cost_ms: float) -> str:
+        """Return the action for a pipeline with the given estimated cost."""
+        if cost_ms <= self.interactive_ms:
+            return CostBudget.RUN
+        if cost_ms > self.max_ms:
+            return CostBudget.REJECT
+        return self.over_budget
+
+    def fitting_edge(self, shape: Tuple[int, ...], cost_ms: float) -> int:
+        """Return the long edge at which a pipeline fits the interactive budget.
+
+        Costs grow with the pixel count, so the edge shrinks with the square
+        root of the overshoot. Pipelines already within the budget keep
+        their full size.
+        """
+        if cost_ms <= self.interactive_ms:
+            return max(shape[:2])
+        factor = math.sqrt(self.interactive_ms / cost_ms)
+        return max(1, int(max(shape[:2]) * factor))
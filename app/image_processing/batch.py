@@ -0,0 +1,73 @@
+"""Processing of many encoded images through one pipeline."""
+
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+import time
+from .codec import decode_reduced, encode_image
+
+logger = logging.getLogger(__name__)
+
+class BatchItem:
+    """Result of processing one image of a batch."""
+
+    def __init__(self, index: int, data: Optional[bytes] = None, error: Optional[str] = None,
+                 shape: Optional[Tuple[int, ...]] = None, step_times: Optional[Dict[int, float]] = None,
+                 elapsed: float = 0.0, cached: bool = False):
+        self.index = index
+        self.data = data
+        self.error = error
+        self.shape = shape
+        self.step_times = step_times or {}
+        self.elapsed = elapsed
+        self.cached = cached
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+    @property
+    def processing_time(self) -> float:
+        """Time spent in operations, in milliseconds."""
+        return sum(self.step_times.values())
+
+    @property
+    def megapixels(self) -> float:
+        """Size of the decoded input image in megapixels."""
+        if self.shape is None:
+            return 0.0
+        return self.shape[0] * self.shape[1] / 1e6
+
+def process_encoded(processor, index: int, data: bytes, pipeline: List[Dict[str, Any]],
+                    extension: str, priority: Optional[str] = None, max_edge: int = 0) -> BatchItem:
+    """Decode, process and encode a single image.
+
+    With ``max_edge``, the image is decoded at reduced resolution where the
+    format allows and processed as a preview of at most that long edge, e.g.
+    for thumbnails.
+
+    Failures are reported on the returned item rather than raised, so one bad
+    image does not abort the rest of a batch.
+    """
+    start_time = time.perf_counter()
+    try:
+        image, scale = decode_reduced(data, max_edge)
+        if image is None:
+            return BatchItem(index, error='Invalid image format',
+                             elapsed=(time.perf_counter() - start_time) * 1000)
+        if max_edge:
+            result = processor.run_preview(image, pipeline, max_edge, priority=priority, image_scale=scale)
+        else:
+            result = processor.run_pipeline(image, pipeline, priority=priority)
+        encoded = encode_image(result.image, extension)
+    except Exception as e:
+        logger.error(f"Error processing batch image {index}: {str(e)}")
+        return BatchItem(index, error=str(e), elapsed=(time.perf_counter() - start_time) * 1000)
+
+    return BatchItem(index, encoded, shape=image.shape, step_times=result.step_times,
+                     elapsed=(time.perf_counter() - start_time) * 1000)
+
+def process_in_worker(index: int, data: bytes, pipeline: List[Dict[str, Any]],
+                      extension: str, max_edge: int = 0) -> BatchItem:
+    """Entry point for batch images sent to a worker process."""
+    from .process_pool import worker_processor
+    return process_encoded(worker_processor(), index, data, pipeline, extension, max_edge=max_edge)
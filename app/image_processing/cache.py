@@ -0,0 +1,92 @@
+"""Size-bounded in-memory caches for images and encoded results."""
+
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+import threading
+import time
+
+def _sizeof(value: Any) -> int:
+    """Return the number of bytes held by a cached value."""
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    return len(value)
+
+class LRUCache:
+    """Thread-safe least-recently-used cache bounded by total size in bytes.
+
+    Values larger than the whole budget are never stored. Inserting a value
+    evicts the least recently used entries until the cache fits again. With
+    a ``ttl``, entries also expire that many seconds after being stored.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = _sizeof,
+                 ttl: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sizeof = sizeof
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._sizes = {}
+        self._expires = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for ``key`` and mark it recently used."""
+        with self._lock:
+            if not self._live(key):
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._live(key)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store ``value`` under ``key``, evicting old entries as needed."""
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._size += size
+            if self.ttl is not None:
+                self._expires[key] = time.monotonic() + self.ttl
+
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._expires.clear()
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        """Total size of cached values in bytes."""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _live(self, key: Hashable) -> bool:
+        """Whether ``key`` is cached and not expired, dropping it if expired."""
+        if key not in self._entries:
+            return False
+        if key in self._expires and self._expires[key] < time.monotonic():
+            self._remove(key)
+            return False
+        return True
+
+    def _remove(self, key: Hashable) -> None:
+        del self._entries[key]
+        self._size -= self._sizes.pop(key)
+        self._expires.pop(key, None)
@@ -0,0 +1,61 @@
+"""Cooperative cancellation of pipeline runs."""
+
+from typing import Dict, Optional
+import threading
+
+class Cancelled(Exception):
+    """Raised inside a pipeline run whose token has been cancelled."""
+
+class CancellationToken:
+    """Flag checked by a pipeline run between (and within) its steps."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self) -> None:
+        """Raise :class:`Cancelled` if the token has been cancelled."""
+        if self._event.is_set():
+            raise Cancelled()
+
+class LatestWins:
+    """Cancels a client's in-flight run as soon as it starts a newer one.
+
+    Interactive clients only care about the result of their latest request,
+    so work on superseded ones is abandoned at the next check.
+    """
+
+    def __init__(self):
+        self._tokens: Dict[str, CancellationToken] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, client_id: Optional[str]) -> Optional[CancellationToken]:
+        """Register a new run for ``client_id``, cancelling its previous one.
+
+        Returns:
+            Optional[CancellationToken]: The token for the new run, or None
+                without a client ID.
+        """
+        if client_id is None:
+            return None
+        token = CancellationToken()
+        with self._lock:
+            previous = self._tokens.get(client_id)
+            self._tokens[client_id] = token
+        if previous is not None:
+            previous.cancel()
+        return token
+
+    def end(self, client_id: Optional[str], token: Optional[CancellationToken]) -> None:
+        """Forget a finished run unless a newer one has replaced it."""
+        if client_id is None:
+            return
+        with self._lock:
+            if self._tokens.get(client_id) is token:
+                del self._tokens[client_id]
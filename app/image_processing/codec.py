@@ -0,0 +1,166 @@
+"""Helpers for decoding uploaded images and encoding results."""
+
+from io import BytesIO
+from typing import BinaryIO, List, Optional, Sequence, Tuple
+import cv2
+import numpy as np
+from PIL import Image
+
+def decode_image(data: bytes) -> Optional[np.ndarray]:
+    """Decode an encoded image into a BGR array.
+
+    Args:
+        data (bytes): Encoded image file contents.
+
+    Returns:
+        Optional[np.ndarray]: The decoded image, or None if the data is not
+            a supported image.
+    """
+    nparr = np.frombuffer(data, np.uint8)
+    return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+# Flags decoding JPEGs at 1/2, 1/4 and 1/8 scale from the DCT coefficients
+REDUCED_DECODE_FLAGS = {
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    2: cv2.IMREAD_REDUCED_COLOR_2
+}
+
+def decode_reduced(data: bytes, max_edge: int) -> Tuple[Optional[np.ndarray], float]:
+    """Decode an image for use at a long edge of about ``max_edge`` pixels.
+
+    JPEGs are decoded at the smallest of 1/2, 1/4 or 1/8 scale whose long
+    edge is still at least ``max_edge``, which skips most of the decoding
+    work and memory. Callers downscale the rest of the way. Other formats,
+    and a ``max_edge`` of 0, are decoded at full resolution.
+
+    Returns:
+        Tuple[Optional[np.ndarray], float]: The decoded image, or None if
+            the data is not a supported image, and its long edge relative
+            to the encoded image's.
+    """
+    if max_edge > 0:
+        try:
+            with Image.open(BytesIO(data)) as header:
+                is_jpeg = header.format == 'JPEG'
+                long_edge = max(header.size)
+        except Exception:
+            is_jpeg = False
+        if is_jpeg:
+            for denominator, flag in REDUCED_DECODE_FLAGS.items():
+                # libjpeg rounds scaled sizes up
+                if -(-long_edge // denominator) >= max_edge:
+                    image = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+                    if image is None:
+                        return None, 1.0
+                    return image, max(image.shape[:2]) / long_edge
+
+    return decode_image(data), 1.0
+
+def probe_dimensions(source: BinaryIO) -> Optional[Tuple[int, int]]:
+    """Read an encoded image's (height, width) from its header alone.
+
+    Only the first few kilobytes are parsed, so this is cheap even for very
+    large files. The stream is left at its start position.
+
+    Returns:
+        Optional[Tuple[int, int]]: The dimensions, or None if the format is
+            not recognized.
+    """
+    start = source.tell()
+    try:
+        with Image.open(source) as image:
+            return image.height, image.width
+    except Exception:
+        return None
+    finally:
+        source.seek(start)
+
+def encode_image(image: np.ndarray, extension: str = '.png', params: Sequence[int] = ()) -> bytes:
+    """Encode an image into the given file format.
+
+    Args:
+        image (np.ndarray): Image to encode.
+        extension (str): Target format as a file extension, e.g. '.png'.
+        params (Sequence[int]): ``cv2.IMWRITE_*`` flag/value pairs.
+
+    Returns:
+        bytes: The encoded file contents.
+
+    Raises:
+        ValueError: If the image cannot be encoded.
+    """
+    success, buffer = cv2.imencode(extension, image, list(params))
+    if not success:
+        raise ValueError(f"Failed to encode image as {extension}")
+    return buffer.tobytes()
+
+def make_thumbnail(image: np.ndarray, max_edge: int) -> np.ndarray:
+    """Downscale an image so its long edge is at most ``max_edge`` pixels.
+
+    Images that already fit, or a ``max_edge`` of 0, are returned unchanged.
+    """
+    height, width = image.shape[:2]
+    if max_edge <= 0 or max(height, width) <= max_edge:
+        return image
+    factor = max_edge / max(height, width)
+    size = (max(1, round(width * factor)), max(1, round(height * factor)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+class OutputFormat:
+    """Encoding settings for result images.
+
+    Args:
+        name (str): One of 'png', 'jpeg' or 'webp'.
+        quality (Optional[int]): JPEG/WebP quality from 1 to 100.
+        compression (Optional[int]): PNG compression level from 0 (fastest)
+            to 9 (smallest).
+
+    Raises:
+        ValueError: If the format or a setting is not supported.
+    """
+
+    EXTENSIONS = {'png': '.png', 'jpeg': '.jpg', 'webp': '.webp'}
+    MIMETYPES = {'png': 'image/png', 'jpeg': 'image/jpeg', 'webp': 'image/webp'}
+
+    def __init__(self, name: str = 'png', quality: Optional[int] = None,
+                 compression: Optional[int] = None):
+        if name not in self.EXTENSIONS:
+            raise ValueError(f"Unsupported output format: {name}")
+        if quality is not None and not 1 <= quality <= 100:
+            raise ValueError("Quality must be between 1 and 100")
+        if compression is not None and not 0 <= compression <= 9:
+            raise ValueError("Compression level must be between 0 and 9")
+        self.name = name
+        self.quality = quality
+        self.compression = compression
+
+    @property
+    def extension(self) -> str:
+        return self.EXTENSIONS[self.name]
+
+    @property
+    def mimetype(self) -> str:
+        return self.MIMETYPES[self.name]
+
+    @property
+    def signature(self) -> str:
+        """Identifies the encoding, e.g. for keying cached results."""
+        params = self.params()
+        if not params:
+            return self.extension
+        return f"{self.extension}:{','.join(map(str, params))}"
+
+    def params(self) -> List[int]:
+        """Return the ``cv2.imencode`` parameters for these settings."""
+        if self.name == 'png' and self.compression is not None:
+            return [cv2.IMWRITE_PNG_COMPRESSION, self.compression]
+        if self.name == 'jpeg' and self.quality is not None:
+            return [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        if self.name == 'webp' and self.quality is not None:
+            return [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+        return []
+
+    def encode(self, image: np.ndarray) -> bytes:
+        """Encode an image with these settings."""
+        return encode_image(image, self.extension, self.params())
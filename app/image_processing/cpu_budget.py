@@ -0,0 +1,78 @@
+"""Sharing of CPU cores between concurrent runs and OpenCV's worker threads."""
+
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+import os
+import threading
+import cv2
+
+class CpuBudget:
+    """Counts runs in progress and can size OpenCV's thread pool from them.
+
+    OpenCV parallelizes many functions internally with a process-wide pool.
+    Given ``set_threads`` (e.g. ``cv2.setNumThreads``), a lone run gets
+    every core; as more runs execute concurrently each one's share shrinks,
+    down to single-threaded OpenCV calls once there are at least as many
+    runs as cores.
+
+    Without ``set_threads`` the budget controls nothing: OpenCV keeps its
+    own threading, and the budget only counts the runs in progress for
+    ``GET /api/scheduler``. Resizing the pool with the load is opt-in as the
+    setting is process-wide and its gain has yet to be measured on a
+    multi-core host (see ``benchmarks/cpu_scaling.py``). Process-pool
+    workers, where the pool itself already fills the cores, always run
+    OpenCV serially.
+
+    Args:
+        cores (Optional[int]): Cores to share, defaults to the CPU count.
+        set_threads (Optional[Callable[[int], None]]): Applies a thread
+            count; OpenCV's threading is left alone if omitted.
+    """
+
+    def __init__(self, cores: Optional[int] = None,
+                 set_threads: Optional[Callable[[int], None]] = None):
+        self.cores = cores or os.cpu_count() or 1
+        self._set_threads = set_threads
+        self._active = 0
+        self._threads = None
+        self._changes = 0
+        self._lock = threading.Lock()
+        self._apply()
+
+    @contextmanager
+    def run(self) -> Iterator[None]:
+        """Count a run as active for the duration of the block."""
+        with self._lock:
+            self._active += 1
+            self._apply()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._apply()
+
+    @property
+    def threads(self) -> int:
+        """Thread count currently given to OpenCV."""
+        return cv2.getNumThreads() if self._set_threads is None else self._threads
+
+    def stats(self) -> Dict[str, int]:
+        """Return the active runs, OpenCV thread count and how often it changed."""
+        with self._lock:
+            return {
+                'cores': self.cores,
+                'managed': self._set_threads is not None,
+                'active_runs': self._active,
+                'opencv_threads': self.threads,
+                'changes': self._changes
+            }
+
+    def _apply(self) -> None:
+        if self._set_threads is None:
+            return
+        threads = max(1, self.cores // max(1, self._active))
+        if threads != self._threads:
+            self._set_threads(threads)
+            self._threads = threads
+            self._changes += 1
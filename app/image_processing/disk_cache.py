@@ -0,0 +1,137 @@
+"""Content-addressed store of encoded results on local disk."""
+
+from collections import OrderedDict
+from typing import Dict, Optional
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class DiskCache:
+    """Size-bounded, least-recently-used cache of encoded results on disk.
+
+    Entries are files named after their key, so they survive restarts and
+    can be shared by every process pointed at the same directory. Files are
+    written atomically and their modification time records the last use,
+    which is what eviction orders by.
+
+    Each process only counts its own writes between scans of the directory.
+    The directory is rescanned when that count exceeds ``max_bytes``, and at
+    least every ``scan_interval`` seconds of writes, so the files written by
+    other processes are counted and evicted too. Eviction frees space down
+    to :data:`LOW_WATER` of the budget, so a full cache is not rescanned on
+    every write. Between scans the directory can exceed ``max_bytes`` by
+    what the other processes wrote in the meantime.
+    """
+
+    # Fraction of max_bytes that eviction frees space down to
+    LOW_WATER = 0.9
+
+    def __init__(self, directory: str, max_bytes: int, scan_interval: float = 60):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.scan_interval = scan_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()
+        self._size = 0
+        self._scanned = 0.0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._scan()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the data stored under ``key`` and mark it recently used."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+                if key in self._entries:
+                    self._size -= self._entries.pop(key)
+            return None
+
+        with self._lock:
+            self.hits += 1
+            if key not in self._entries:
+                self._entries[key] = len(data)
+                self._size += len(data)
+            self._entries.move_to_end(key)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store ``data`` under ``key``, evicting old entries as needed."""
+        if len(data) > self.max_bytes:
+            return
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {key}: {str(e)}")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)
+            self._entries[key] = len(data)
+            self._size += len(data)
+
+            if self._size > self.max_bytes or time.monotonic() - self._scanned > self.scan_interval:
+                self._scan()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss and eviction counters and the current usage."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes
+            }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _scan(self) -> None:
+        """Re-index the directory, then evict the least recently used files if it is over budget."""
+        found = []
+        for root, _dirs, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    # Evicted by another process meanwhile
+                    continue
+                found.append((stat.st_mtime, name, stat.st_size))
+
+        self._entries = OrderedDict((key, size) for _mtime, key, size in sorted(found))
+        self._size = sum(self._entries.values())
+        self._scanned = time.monotonic()
+
+        if self._size > self.max_bytes:
+            while self._size > self.max_bytes * self.LOW_WATER and self._entries:
+                oldest, size = self._entries.popitem(last=False)
+                self._size -= size
+                self.evictions += 1
+                try:
+                    os.remove(self._path(oldest))
+                except OSError:
+                    pass
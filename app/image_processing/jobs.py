@@ -0,0 +1,157 @@
+"""Background execution of long-running pipelines."""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+import logging
+import threading
+import time
+import uuid
+import numpy as np
+from .cancellation import Cancelled, CancellationToken
+from .codec import encode_image
+from .scheduler import Scheduler
+
+logger = logging.getLogger(__name__)
+
+class Job:
+    """State of a pipeline submitted to a :class:`JobManager`."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    def __init__(self, total_steps: int):
+        self.id = uuid.uuid4().hex
+        self.status = Job.QUEUED
+        self.current_step = 0
+        self.total_steps = total_steps
+        self.result: Optional[bytes] = None
+        self.processing_time = 0.0
+        self.error: Optional[str] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_token = CancellationToken()
+        self._done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job finishes or ``timeout`` seconds pass.
+
+        Returns:
+            bool: Whether the job has finished.
+        """
+        return self._done.wait(timeout)
+
+    def cancel(self) -> None:
+        """Stop the job: a queued job never starts, a running one stops at its next step."""
+        self.cancel_token.cancel()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the job status to a dictionary representation."""
+        status = {
+            'job_id': self.id,
+            'status': self.status,
+            'progress': {
+                'step': self.current_step,
+                'total': self.total_steps
+            }
+        }
+        if self.status == Job.DONE:
+            status['processing_time'] = round(self.processing_time)
+        if self.error is not None:
+            status['error'] = self.error
+        return status
+
+class JobManager:
+    """Runs pipelines on a local worker pool and keeps results for a while.
+
+    Jobs run on their own threads, so long pipelines do not hold request
+    threads and short requests never queue behind them. Finished jobs are
+    forgotten ``ttl`` seconds after completion.
+    """
+
+    def __init__(self, processor, max_workers: int = 2, ttl: float = 600):
+        self._processor = processor
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._ttl = ttl
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, image: np.ndarray, pipeline: List[Dict[str, Any]],
+               image_digest: Optional[str] = None, extension: str = '.png',
+               stream_id: Optional[str] = None, priority: str = Scheduler.BATCH) -> Job:
+        """Queue a pipeline for background execution.
+
+        Args:
+            image (np.ndarray): Input image to process.
+            pipeline (List[Dict[str, Any]]): List of operations to apply.
+            image_digest (Optional[str]): Stable identifier of the input
+                image, used for the processor's result cache.
+            extension (str): Output format as a file extension.
+            stream_id (Optional[str]): Stream whose state stateful
+                operations should use.
+            priority (str): Scheduler class of the run.
+
+        Returns:
+            Job: The queued job.
+        """
+        self._purge_expired()
+        job = Job(total_steps=len(pipeline))
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, image, pipeline, image_digest, extension, stream_id, priority)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job with the given ID, or None if unknown or expired."""
+        self._purge_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a job and return it, or None if unknown or expired."""
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel()
+        return job
+
+    def _run(self, job: Job, image: np.ndarray, pipeline: List[Dict[str, Any]],
+             image_digest: Optional[str], extension: str, stream_id: Optional[str],
+             priority: str) -> None:
+        job.status = Job.RUNNING
+
+        def on_step(index: int, _result: np.ndarray) -> None:
+            job.current_step = index + 1
+
+        try:
+            job.cancel_token.check()
+            result = self._processor.run_pipeline(image, pipeline, image_digest=image_digest,
+                                                  on_step=on_step, stream_id=stream_id,
+                                                  cancel=job.cancel_token, priority=priority)
+            job.result = encode_image(result.image, extension)
+            job.processing_time = result.processing_time
+            job.current_step = job.total_steps
+            job.status = Job.DONE
+        except Cancelled:
+            job.status = Job.CANCELLED
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            job.error = 'An error occurred during image processing'
+            job.status = Job.FAILED
+        finally:
+            job.finished_at = time.monotonic()
+            job._done.set()
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at is not None and now - job.finished_at > self._ttl
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
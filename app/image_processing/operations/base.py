@@ -1,15 +1,61 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+import copy
 import numpy as np
+from ..cancellation import CancellationToken
 
 class ImageOperation(ABC):
     """Base class for all image processing operations."""
+
+    # Operations that map each channel value independently of its position,
+    # its neighbours and the other channels. Consecutive pointwise steps are
+    # fused by the processor into a single lookup-table pass.
+    pointwise = False
+
+    # Operations whose output depends on anything other than the input image
+    # and the parameters (e.g. state carried between frames) must not have
+    # their results cached.
+    cacheable = True
+
+    # Operations that carry state from one frame to the next (models, previous
+    # frames). Their state is created by ``create_state`` and kept per stream
+    # by the processor; stateful operations are never cacheable.
+    stateful = False
+
+    # Operations whose output pixel depends only on input pixels within
+    # ``halo()`` of it, so large images can be processed tile by tile.
+    # Pointwise operations are always tileable.
+    tileable = False
+
+    # Parameters measured in pixels (lengths) or square pixels (areas). They
+    # are rescaled when a pipeline runs on a downscaled proxy of the image so
+    # the proxy looks like the full-resolution result.
+    length_params: Tuple[str, ...] = ()
+    area_params: Tuple[str, ...] = ()
+
+    # Rough single-core time in milliseconds per megapixel of input, used to
+    # estimate pipeline costs for admission control. Operations whose cost
+    # depends on their parameters refine it in ``estimate_cost``.
+    cost_per_megapixel = 10.0
+
+    # Set on bound copies whose run can be cancelled; long-running operations
+    # poll it through ``check_cancelled``.
+    cancel_token: Optional[CancellationToken] = None
+
+    # Where the operation is listed in the catalog; see CATEGORY_METADATA.
+    category = ''
+    subcategory: Optional[str] = None
+
+    # Implementation version, part of the key of persisted results. Bump it
+    # whenever a change alters the output for the same input and parameters.
+    version = 1
     
     def __init__(self, name: str, description: str, icon: str):
         self.name = name
         self.description = description
         self.icon = icon
         self._params = self.default_params()
+        self._state = self.create_state()
 
     @abstractmethod
     def process(self, image: np.ndarray) -> np.ndarray:
@@ -21,6 +67,16 @@ class ImageOperation(ABC):
         """Return default parameters for the operation."""
         pass
 
+    def lookup_table(self, table: np.ndarray) -> np.ndarray:
+        """Map a lookup table through this operation.
+
+        ``table`` is a single-row uint8 image holding one 256-entry table per
+        channel. Pointwise operations treat every value the same way wherever
+        it appears, so processing the table composes this operation with
+        whatever the table already encodes.
+        """
+        return self.process(table)
+
     def get_params(self) -> Dict[str, Any]:
         """Get current parameters."""
         return self._params
@@ -31,6 +87,69 @@ class ImageOperation(ABC):
             if key in self._params:
                 self._params[key] = value
 
+    def bind(self, params: Dict[str, Any], state: Optional[Dict[str, Any]] = None,
+             cancel: Optional[CancellationToken] = None) -> 'ImageOperation':
+        """Return a copy of the operation with ``params`` applied.
+
+        The copy owns its parameters but shares everything else (classifiers,
+        detectors, ...) with this instance, so registered operations can be
+        used by concurrent requests without ever being mutated. Stateful
+        operations read and update ``state`` instead of the instance's own,
+        and ``cancel`` is what ``check_cancelled`` polls.
+        """
+        bound = copy.copy(self)
+        bound._params = dict(self._params)
+        bound.set_params(params)
+        if state is not None:
+            bound._state = state
+        if cancel is not None:
+            bound.cancel_token = cancel
+        return bound
+
+    def check_cancelled(self) -> None:
+        """Raise :class:`Cancelled` if the run using this operation was cancelled.
+
+        Operations that iterate call this between iterations so superseded
+        runs stop early.
+        """
+        if self.cancel_token is not None:
+            self.cancel_token.check()
+
+    def scaled_params(self, factor: float) -> Dict[str, Any]:
+        """Return the current parameters adjusted for an image resized by ``factor``."""
+        params = dict(self._params)
+        for key in self.length_params:
+            params[key] = max(1, int(round(params[key] * factor)))
+        for key in self.area_params:
+            params[key] = max(1, int(round(params[key] * factor * factor)))
+        return params
+
+    def halo(self) -> int:
+        """Return how far, in pixels, each output pixel looks into the input.
+
+        Tiled execution reads this many extra pixels around every tile.
+        """
+        return 0
+
+    def estimate_cost(self, megapixels: float) -> float:
+        """Estimate the milliseconds needed to process an image of ``megapixels``."""
+        return self.cost_per_megapixel * megapixels
+
+    def load_resources(self) -> None:
+        """Load data files or models that are otherwise loaded on first use.
+
+        Called by :meth:`ImageProcessor.preload`, e.g. so a server loads
+        them once before forking its workers.
+        """
+
+    def create_state(self) -> Dict[str, Any]:
+        """Return fresh state for one stream of frames."""
+        return {}
+
+    def state_nbytes(self, state: Dict[str, Any]) -> int:
+        """Estimate the memory held by a state created by ``create_state``."""
+        return sum(value.nbytes for value in state.values() if isinstance(value, np.ndarray))
+
     @abstractmethod
     def param_schema(self) -> Dict[str, Dict[str, Any]]:
         """Return parameter schema for UI generation."""
@@ -4,6 +4,10 @@ from typing import Dict, Any
 from .base import ImageOperation
 
 class GrayscaleOperation(ImageOperation):
+    category = 'effects'
+    cost_per_megapixel = 1.0
+    tileable = True
+
     def __init__(self):
         super().__init__(
             name="Grayscale",
@@ -22,6 +26,11 @@ class GrayscaleOperation(ImageOperation):
         return {}
 
 class BrightnessOperation(ImageOperation):
+    category = 'basic'
+    cost_per_megapixel = 4.0
+    pointwise = True
+    tileable = True
+
     def __init__(self):
         super().__init__(
             name="Brightness",
@@ -52,6 +61,11 @@ class BrightnessOperation(ImageOperation):
         }
 
 class ContrastOperation(ImageOperation):
+    category = 'basic'
+    cost_per_megapixel = 4.0
+    pointwise = True
+    tileable = True
+
     def __init__(self):
         super().__init__(
             name="Contrast",
@@ -84,6 +98,10 @@ class ContrastOperation(ImageOperation):
         }
 
 class SaturationOperation(ImageOperation):
+    category = 'color'
+    cost_per_megapixel = 15.0
+    tileable = True
+
     def __init__(self):
         super().__init__(
             name="Saturation",
@@ -129,6 +147,10 @@ class SaturationOperation(ImageOperation):
         }
 
 class HueOperation(ImageOperation):
+    category = 'color'
+    cost_per_megapixel = 30.0
+    tileable = True
+
     def __init__(self):
         super().__init__(
             name="Hue Rotation",
@@ -4,6 +4,10 @@ from typing import Dict, Any
 from .base import ImageOperation
 
 class SepiaOperation(ImageOperation):
+    category = 'effects'
+    cost_per_megapixel = 20.0
+    tileable = True
+
     def __init__(self):
         super().__init__(
             name="Sepia",
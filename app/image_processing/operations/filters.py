@@ -4,6 +4,11 @@ from typing import Dict, Any
 from .base import ImageOperation
 
 class BlurOperation(ImageOperation):
+    category = 'filters'
+    cost_per_megapixel = 1.0
+    tileable = True
+    length_params = ('radius',)
+
     def __init__(self):
         super().__init__(
             name="Gaussian Blur",
@@ -18,6 +23,13 @@ class BlurOperation(ImageOperation):
             radius += 1
         return cv2.GaussianBlur(image, (radius, radius), 0)
 
+    def halo(self) -> int:
+        return self._params['radius'] // 2 + 1
+
+    def estimate_cost(self, megapixels: float) -> float:
+        # Separable kernel, so cost grows linearly with the radius
+        return (self.cost_per_megapixel + 0.6 * self._params['radius']) * megapixels
+
     def default_params(self) -> Dict[str, Any]:
         return {
             'radius': 5
@@ -34,6 +46,10 @@ class BlurOperation(ImageOperation):
         }
 
 class SharpenOperation(ImageOperation):
+    category = 'filters'
+    cost_per_megapixel = 5.0
+    tileable = True
+
     def __init__(self):
         super().__init__(
             name="Sharpen",
@@ -51,6 +67,9 @@ class SharpenOperation(ImageOperation):
         sharpened = cv2.filter2D(image, -1, kernel * amount)
         return cv2.addWeighted(image, 1 - amount, sharpened, amount, 0)
 
+    def halo(self) -> int:
+        return 1
+
     def default_params(self) -> Dict[str, Any]:
         return {
             'amount': 50
@@ -2,8 +2,13 @@ import cv2
 import numpy as np
 from typing import Dict, Any
 from .base import ImageOperation
+from ..tiling import process_tiled
 
 class AddNoiseOperation(ImageOperation):
+    category = 'noise'
+    cost_per_megapixel = 100.0
+    tileable = True
+
     def __init__(self):
         super().__init__(
             name="Add Noise",
@@ -61,6 +66,10 @@ class AddNoiseOperation(ImageOperation):
         }
 
 class DenoiseOperation(ImageOperation):
+    category = 'noise'
+    cost_per_megapixel = 2800.0
+    tileable = True
+
     def __init__(self):
         super().__init__(
             name="Denoise",
@@ -79,14 +88,55 @@ class DenoiseOperation(ImageOperation):
             ksize = 2 * int(strength / 10) + 1
             return cv2.medianBlur(image, ksize)
         else:  # non_local_means
-            return cv2.fastNlMeansDenoisingColored(
-                image,
-                None,
-                strength * 0.1,  # h (filter strength for luminance)
-                strength * 0.1,  # hColor (filter strength for color)
-                7,              # templateWindowSize
-                21             # searchWindowSize
-            )
+            def denoise(tile: np.ndarray) -> np.ndarray:
+                self.check_cancelled()
+                return cv2.fastNlMeansDenoisingColored(
+                    tile,
+                    None,
+                    strength * 0.1,  # h (filter strength for luminance)
+                    strength * 0.1,  # hColor (filter strength for color)
+                    7,              # templateWindowSize
+                    21             # searchWindowSize
+                )
+            
+            if self.cancel_token is None:
+                return denoise(image)
+            # Work tile by tile so a cancelled run stops between tiles; the
+            # halo keeps the result identical to a single pass
+            return process_tiled(denoise, image, self.halo(), tile_size=512)
+
+    def scaled_params(self, factor: float) -> Dict[str, Any]:
+        params = dict(self._params)
+        # Strength sets the kernel size for gaussian and median filtering,
+        # but the filter strength h for non-local means
+        if params['method'] in ('gaussian', 'median'):
+            params['strength'] = max(1, int(round(params['strength'] * factor)))
+        return params
+
+    def halo(self) -> int:
+        strength = self._params['strength']
+        method = self._params['method']
+        
+        if method == 'gaussian':
+            # OpenCV derives the kernel from sigma as roughly 3 sigma per side
+            return int(np.ceil(strength * 0.5 * 3)) + 1
+        elif method == 'median':
+            return int(strength / 10) + 1
+        else:  # non_local_means
+            # Half the search window plus half the template window
+            return 21 // 2 + 7 // 2
+
+    def estimate_cost(self, megapixels: float) -> float:
+        # cost_per_megapixel is for non-local means, which has fixed windows
+        strength = self._params['strength']
+        method = self._params['method']
+        
+        if method == 'gaussian':
+            return 5.0 * strength * megapixels
+        elif method == 'median':
+            return 4.0 * strength * megapixels
+        else:  # non_local_means
+            return self.cost_per_megapixel * megapixels
 
     def default_params(self) -> Dict[str, Any]:
         return {
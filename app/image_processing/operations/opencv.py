@@ -4,6 +4,10 @@ from typing import Dict, Any
 from .base import ImageOperation
 
 class CannyEdgeOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'edge_detection'
+    cost_per_megapixel = 4.0
+
     def __init__(self):
         super().__init__(
             name="Canny Edge",
@@ -50,6 +54,12 @@ class CannyEdgeOperation(ImageOperation):
         }
 
 class AdaptiveThresholdOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'edge_detection'
+    cost_per_megapixel = 6.0
+    tileable = True
+    length_params = ('block_size',)
+
     def __init__(self):
         super().__init__(
             name="Adaptive Threshold",
@@ -61,6 +71,7 @@ class AdaptiveThresholdOperation(ImageOperation):
         block_size = self._params['block_size']
         if block_size % 2 == 0:
             block_size += 1  # Must be odd
+        block_size = max(block_size, 3)
             
         # Convert to grayscale if needed
         if len(image.shape) == 3:
@@ -81,6 +92,9 @@ class AdaptiveThresholdOperation(ImageOperation):
         # Convert back to BGR for consistency
         return cv2.cvtColor(binary, cv2.COLOR_GRAY2BGR)
 
+    def halo(self) -> int:
+        return self._params['block_size'] // 2 + 1
+
     def default_params(self) -> Dict[str, Any]:
         return {
             'block_size': 11,
@@ -117,6 +131,11 @@ class AdaptiveThresholdOperation(ImageOperation):
         }
 
 class ContourDrawOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'edge_detection'
+    cost_per_megapixel = 30.0
+    length_params = ('thickness',)
+
     def __init__(self):
         super().__init__(
             name="Draw Contours",
@@ -174,6 +193,12 @@ class ContourDrawOperation(ImageOperation):
         }
 
 class MorphologyOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'morphological'
+    cost_per_megapixel = 1.0
+    tileable = True
+    length_params = ('kernel_size',)
+
     def __init__(self):
         super().__init__(
             name="Morphology",
@@ -201,6 +226,17 @@ class MorphologyOperation(ImageOperation):
         else:  # gradient
             return cv2.morphologyEx(image, cv2.MORPH_GRADIENT, kernel, iterations=iterations)
 
+    def halo(self) -> int:
+        reach = self._params['kernel_size'] // 2 * self._params['iterations']
+        if self._params['operation'] in ('open', 'close'):
+            # Erosion followed by dilation (or the reverse)
+            return 2 * reach
+        return reach
+
+    def estimate_cost(self, megapixels: float) -> float:
+        passes = self._params['iterations'] * (2 if self._params['operation'] in ('open', 'close') else 1)
+        return self.cost_per_megapixel * passes * self._params['kernel_size'] / 3 * megapixels
+
     def default_params(self) -> Dict[str, Any]:
         return {
             'operation': 'dilate',
@@ -231,6 +267,10 @@ class MorphologyOperation(ImageOperation):
         }
 
 class CornerDetectionOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'object_detection'
+    cost_per_megapixel = 15.0
+
     def __init__(self):
         super().__init__(
             name="Corner Detection",
@@ -310,6 +350,11 @@ class CornerDetectionOperation(ImageOperation):
         }
 
 class ColorSpaceOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'color'
+    cost_per_megapixel = 4.0
+    tileable = True
+
     def __init__(self):
         super().__init__(
             name="Color Space",
@@ -351,6 +396,10 @@ class ColorSpaceOperation(ImageOperation):
         }
 
 class HistogramEqualizationOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'color'
+    cost_per_megapixel = 16.0
+
     def __init__(self):
         super().__init__(
             name="Histogram Equalization",
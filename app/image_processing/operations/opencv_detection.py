@@ -1,37 +1,70 @@
 import cv2
 import numpy as np
-from typing import Dict, Any
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List
 from .base import ImageOperation
 
 class HaarCascadeDetectionOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'object_detection'
+    cost_per_megapixel = 100.0
+
     def __init__(self):
         super().__init__(
             name="Haar Cascade Detection",
             description="Detect objects using Haar Cascade classifiers",
             icon="👁️"
         )
-        
-        self._cascades = {
-            'face': cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'),
-            'eye': cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml'),
-            'smile': cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_smile.xml'),
-            'body': cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_fullbody.xml')
-        }
+
+    # Cascade files by detector, each parsed the first time it is used
+    CASCADE_FILES = {
+        'face': 'haarcascade_frontalface_default.xml',
+        'eye': 'haarcascade_eye.xml',
+        'smile': 'haarcascade_smile.xml',
+        'body': 'haarcascade_fullbody.xml'
+    }
+    # Idle classifiers by detector
+    _cascades: Dict[str, List[Any]] = {}
+    _cascades_lock = threading.Lock()
+
+    @classmethod
+    @contextmanager
+    def cascade(cls, detector: str) -> Iterator[Any]:
+        """Lend a classifier for ``detector`` to the caller alone.
+
+        detectMultiScale must not run concurrently on one classifier, so
+        another copy is parsed whenever every loaded one is in use. Copies
+        are kept for reuse, as many as ever ran at once.
+        """
+        with cls._cascades_lock:
+            idle = cls._cascades.setdefault(detector, [])
+            classifier = idle.pop() if idle else None
+        if classifier is None:
+            classifier = cv2.CascadeClassifier(cv2.data.haarcascades + cls.CASCADE_FILES[detector])
+        try:
+            yield classifier
+        finally:
+            with cls._cascades_lock:
+                cls._cascades[detector].append(classifier)
+
+    def load_resources(self) -> None:
+        for detector in self.CASCADE_FILES:
+            with self.cascade(detector):
+                pass
 
     def process(self, image: np.ndarray) -> np.ndarray:
         # Convert to grayscale
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
-        # Get selected cascade
-        cascade = self._cascades[self._params['detector']]
-        
-        # Detect objects
-        objects = cascade.detectMultiScale(
-            gray,
-            scaleFactor=self._params['scale_factor'],
-            minNeighbors=self._params['min_neighbors'],
-            minSize=(30, 30)
-        )
+        # Detect objects with a classifier of the selected cascade
+        with self.cascade(self._params['detector']) as cascade:
+            objects = cascade.detectMultiScale(
+                gray,
+                scaleFactor=self._params['scale_factor'],
+                minNeighbors=self._params['min_neighbors'],
+                minSize=(30, 30)
+            )
         
         # Draw rectangles around detected objects
         result = image.copy()
@@ -70,6 +103,10 @@ class HaarCascadeDetectionOperation(ImageOperation):
         }
 
 class TemplateMatchingOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'object_detection'
+    cost_per_megapixel = 50.0
+
     def __init__(self):
         super().__init__(
             name="Template Matching",
@@ -125,6 +162,17 @@ class TemplateMatchingOperation(ImageOperation):
         }
 
 class BackgroundSubtractionOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'object_detection'
+    cost_per_megapixel = 20.0
+    cacheable = False
+    stateful = True
+
+    # Approximate model size per pixel (5 Gaussians of weight, mean and
+    # variance for MOG2; a comparable sample buffer for KNN)
+    MODEL_BYTES_PER_PIXEL = 100
+    area_params = ('min_area',)
+
     def __init__(self):
         super().__init__(
             name="Background Subtraction",
@@ -132,14 +180,24 @@ class BackgroundSubtractionOperation(ImageOperation):
             icon="🎬"
         )
         
-        self._subtractors = {
-            'mog2': cv2.createBackgroundSubtractorMOG2(),
-            'knn': cv2.createBackgroundSubtractorKNN()
-        }
+    def create_state(self) -> Dict[str, Any]:
+        # Models are created when a stream first uses them
+        return {'subtractors': {}, 'pixels': 0}
+
+    def state_nbytes(self, state: Dict[str, Any]) -> int:
+        return len(state['subtractors']) * state['pixels'] * self.MODEL_BYTES_PER_PIXEL
 
     def process(self, image: np.ndarray) -> np.ndarray:
         # Get selected subtractor
-        subtractor = self._subtractors[self._params['method']]
+        method = self._params['method']
+        subtractors = self._state['subtractors']
+        if method not in subtractors:
+            if method == 'knn':
+                subtractors[method] = cv2.createBackgroundSubtractorKNN()
+            else:
+                subtractors[method] = cv2.createBackgroundSubtractorMOG2()
+        subtractor = subtractors[method]
+        self._state['pixels'] = image.shape[0] * image.shape[1]
         
         # Apply background subtraction
         fgmask = subtractor.apply(image)
@@ -201,6 +259,12 @@ class BackgroundSubtractionOperation(ImageOperation):
         }
 
 class OpticalFlowOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'object_detection'
+    cost_per_megapixel = 5.0
+    cacheable = False
+    stateful = True
+
     def __init__(self):
         super().__init__(
             name="Optical Flow",
@@ -208,17 +272,19 @@ class OpticalFlowOperation(ImageOperation):
             icon="➡️"
         )
         
-        self._prev_gray = None
-        self._prev_points = None
+    def create_state(self) -> Dict[str, Any]:
+        return {'prev_gray': None, 'prev_points': None}
 
     def process(self, image: np.ndarray) -> np.ndarray:
+        state = self._state
+        
         # Convert to grayscale
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
-        if self._prev_gray is None:
-            self._prev_gray = gray
+        if state['prev_gray'] is None:
+            state['prev_gray'] = gray
             # Find initial points to track
-            self._prev_points = cv2.goodFeaturesToTrack(
+            state['prev_points'] = cv2.goodFeaturesToTrack(
                 gray,
                 maxCorners=self._params['max_corners'],
                 qualityLevel=0.01,
@@ -226,20 +292,20 @@ class OpticalFlowOperation(ImageOperation):
             )
             return image
             
-        if self._prev_points is None:
+        if state['prev_points'] is None:
             return image
             
         # Calculate optical flow
         new_points, status, _ = cv2.calcOpticalFlowPyrLK(
-            self._prev_gray,
+            state['prev_gray'],
             gray,
-            self._prev_points,
+            state['prev_points'],
             None
         )
         
         # Select good points
         good_new = new_points[status == 1]
-        good_old = self._prev_points[status == 1]
+        good_old = state['prev_points'][status == 1]
         
         # Draw the tracks
         result = image.copy()
@@ -250,8 +316,8 @@ class OpticalFlowOperation(ImageOperation):
             cv2.circle(result, (int(a), int(b)), 3, (0, 0, 255), -1)
             
         # Update previous points and frame
-        self._prev_gray = gray
-        self._prev_points = good_new.reshape(-1, 1, 2)
+        state['prev_gray'] = gray
+        state['prev_points'] = good_new.reshape(-1, 1, 2)
         
         return result
 
@@ -4,6 +4,10 @@ from typing import Dict, Any
 from .base import ImageOperation
 
 class SIFTDetectionOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'object_detection'
+    cost_per_megapixel = 200.0
+
     def __init__(self):
         super().__init__(
             name="SIFT Features",
@@ -62,6 +66,10 @@ class SIFTDetectionOperation(ImageOperation):
         }
 
 class ORBDetectionOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'object_detection'
+    cost_per_megapixel = 5.0
+
     def __init__(self):
         super().__init__(
             name="ORB Features",
@@ -113,6 +121,11 @@ class ORBDetectionOperation(ImageOperation):
         }
 
 class BlobDetectionOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'object_detection'
+    cost_per_megapixel = 15.0
+    area_params = ('min_area', 'max_area')
+
     def __init__(self):
         super().__init__(
             name="Blob Detection",
@@ -187,6 +200,11 @@ class BlobDetectionOperation(ImageOperation):
         }
 
 class GoodFeaturesToTrackOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'object_detection'
+    cost_per_megapixel = 15.0
+    length_params = ('min_distance',)
+
     def __init__(self):
         super().__init__(
             name="Good Features",
@@ -4,6 +4,10 @@ from typing import Dict, Any
 from .base import ImageOperation
 
 class WatershedSegmentationOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'object_detection'
+    cost_per_megapixel = 80.0
+
     def __init__(self):
         super().__init__(
             name="Watershed Segmentation",
@@ -64,6 +68,12 @@ class WatershedSegmentationOperation(ImageOperation):
         }
 
 class GrabCutSegmentationOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'object_detection'
+    # Mostly model initialization, plus a smaller cost per iteration
+    cost_per_megapixel = 10000.0
+    length_params = ('margin',)
+
     def __init__(self):
         super().__init__(
             name="GrabCut Segmentation",
@@ -88,13 +98,17 @@ class GrabCutSegmentationOperation(ImageOperation):
         bgdModel = np.zeros((1,65), np.float64)
         fgdModel = np.zeros((1,65), np.float64)
         
-        # Apply GrabCut
+        # Apply GrabCut one iteration at a time, continuing from the stored
+        # models, so a cancelled run stops between iterations
         cv2.grabCut(
             image, mask, rect,
             bgdModel, fgdModel,
-            self._params['iterations'],
+            1,
             cv2.GC_INIT_WITH_RECT
         )
+        for _ in range(self._params['iterations'] - 1):
+            self.check_cancelled()
+            cv2.grabCut(image, mask, None, bgdModel, fgdModel, 1, cv2.GC_EVAL)
         
         # Create mask for probable and definite foreground
         mask2 = np.where((mask==2)|(mask==0), 0, 1).astype('uint8')
@@ -104,6 +118,9 @@ class GrabCutSegmentationOperation(ImageOperation):
         
         return result
 
+    def estimate_cost(self, megapixels: float) -> float:
+        return (self.cost_per_megapixel + 300.0 * self._params['iterations']) * megapixels
+
     def default_params(self) -> Dict[str, Any]:
         return {
             'margin': 10,
@@ -129,6 +146,11 @@ class GrabCutSegmentationOperation(ImageOperation):
         }
 
 class KMeansSegmentationOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'object_detection'
+    # Per cluster; kmeans makes 10 attempts of up to 100 iterations each
+    cost_per_megapixel = 1050.0
+
     def __init__(self):
         super().__init__(
             name="K-Means Segmentation",
@@ -144,10 +166,19 @@ class KMeansSegmentationOperation(ImageOperation):
         # Define criteria and apply k-means
         criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 100, 0.2)
         k = self._params['clusters']
-        _, labels, centers = cv2.kmeans(
-            pixels, k, None, criteria, 10,
-            cv2.KMEANS_RANDOM_CENTERS
-        )
+        
+        # Ten attempts keeping the most compact clustering, as kmeans does
+        # internally, but made one by one so a cancelled run stops early
+        best = None
+        for _ in range(10):
+            self.check_cancelled()
+            compactness, labels, centers = cv2.kmeans(
+                pixels, k, None, criteria, 1,
+                cv2.KMEANS_RANDOM_CENTERS
+            )
+            if best is None or compactness < best[0]:
+                best = (compactness, labels, centers)
+        _, labels, centers = best
         
         # Convert back to uint8
         centers = np.uint8(centers)
@@ -156,6 +187,9 @@ class KMeansSegmentationOperation(ImageOperation):
         # Reshape back to image dimensions
         return segmented.reshape(image.shape)
 
+    def estimate_cost(self, megapixels: float) -> float:
+        return self.cost_per_megapixel * self._params['clusters'] * megapixels
+
     def default_params(self) -> Dict[str, Any]:
         return {
             'clusters': 5
@@ -173,6 +207,9 @@ class KMeansSegmentationOperation(ImageOperation):
         }
 
 class MeanShiftSegmentationOperation(ImageOperation):
+    category = 'opencv'
+    subcategory = 'object_detection'
+
     def __init__(self):
         super().__init__(
             name="Mean Shift Segmentation",
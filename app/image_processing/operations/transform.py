@@ -4,6 +4,9 @@ from typing import Dict, Any
 from .base import ImageOperation
 
 class RotateOperation(ImageOperation):
+    category = 'transform'
+    cost_per_megapixel = 10.0
+
     def __init__(self):
         super().__init__(
             name="Rotate",
@@ -48,6 +51,9 @@ class RotateOperation(ImageOperation):
         }
 
 class FlipOperation(ImageOperation):
+    category = 'transform'
+    cost_per_megapixel = 1.0
+
     def __init__(self):
         super().__init__(
             name="Flip",
@@ -0,0 +1,138 @@
+"""Pipeline execution on worker processes with frames in shared memory."""
+
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .cancellation import Cancelled, CancellationToken
+
+class SharedFrame:
+    """Picklable reference to an image stored in a shared memory block."""
+
+    def __init__(self, name: str, shape: Tuple[int, ...], dtype: str):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    @classmethod
+    def create(cls, image: np.ndarray) -> Tuple['SharedFrame', shared_memory.SharedMemory]:
+        """Copy ``image`` into a new block and return a reference and the block."""
+        block = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+        np.ndarray(image.shape, image.dtype, buffer=block.buf)[...] = image
+        return cls(block.name, image.shape, image.dtype.str), block
+
+    def view(self, block: shared_memory.SharedMemory) -> np.ndarray:
+        """Return the image as an array backed by ``block``."""
+        return np.ndarray(self.shape, np.dtype(self.dtype), buffer=block.buf)
+
+    def take(self) -> np.ndarray:
+        """Copy the image out of its block and free the block."""
+        block = shared_memory.SharedMemory(name=self.name)
+        try:
+            view = self.view(block)
+            image = view.copy()
+            # The block cannot be closed while an array still exports it
+            del view
+        finally:
+            block.close()
+            block.unlink()
+        return image
+
+# Processor owned by a worker process
+_worker_processor = None
+
+def init_worker() -> None:
+    """Build the worker's processor, importing the operation registry up front."""
+    global _worker_processor
+    if _worker_processor is None:
+        import cv2
+        from .cpu_budget import CpuBudget
+        from .processor import ImageProcessor
+        # The pool already runs one worker per core, so OpenCV stays serial
+        budget = CpuBudget(cores=1, set_threads=cv2.setNumThreads)
+        _worker_processor = ImageProcessor(cache_bytes=0, cpu=budget)
+
+def worker_processor():
+    """Return the processor of the current worker process."""
+    init_worker()
+    return _worker_processor
+
+def _run_shared(frame: SharedFrame, pipeline: List[Dict[str, Any]]) -> Tuple[SharedFrame, Dict[int, float]]:
+    """Worker side of :meth:`ProcessPool.run_pipeline`."""
+    block = shared_memory.SharedMemory(name=frame.name)
+    try:
+        image = frame.view(block)
+        image.flags.writeable = False
+        result = worker_processor().run_pipeline(image, pipeline)
+        output, output_block = SharedFrame.create(result.image)
+        # The block outlives this handle until the parent unlinks it
+        output_block.close()
+        step_times = result.step_times
+        del image, result
+    finally:
+        block.close()
+    return output, step_times
+
+class ProcessPool:
+    """Runs pipelines on worker processes, bypassing the GIL.
+
+    Frames are handed over through :mod:`multiprocessing.shared_memory`
+    blocks: the input is copied into one block and the worker writes its
+    result into another, so only their names cross the process boundary
+    rather than pickled arrays. Workers import the operation registry and
+    build their processor when they start, so the first run pays no
+    import cost.
+
+    Args:
+        max_workers (Optional[int]): Worker processes, defaults to the CPU
+            count.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker)
+
+    def run_pipeline(self, image: np.ndarray, pipeline: List[Dict[str, Any]],
+                     cancel: Optional[CancellationToken] = None) -> Tuple[np.ndarray, Dict[int, float]]:
+        """Process an image on a worker.
+
+        Operations keep no state between runs here, so stateful pipelines
+        must run in the calling process.
+
+        Args:
+            image (np.ndarray): Input image to process.
+            pipeline (List[Dict[str, Any]]): List of operations to apply.
+            cancel (Optional[CancellationToken]): Abandons the run when
+                cancelled; a worker that already started finishes it, and
+                its result is discarded.
+
+        Returns:
+            Tuple[np.ndarray, Dict[int, float]]: The processed image and
+                per-step processing times in milliseconds.
+
+        Raises:
+            Cancelled: If ``cancel`` was cancelled before the run finished.
+        """
+        frame, block = SharedFrame.create(image)
+        try:
+            future = self.executor.submit(_run_shared, frame, pipeline)
+            if cancel is not None:
+                # Wake up regularly to notice cancellation
+                while not wait([future], timeout=0.05).done:
+                    if cancel.cancelled:
+                        if not future.cancel():
+                            future.add_done_callback(_discard)
+                        raise Cancelled()
+            output, step_times = future.result()
+        finally:
+            block.close()
+            block.unlink()
+        return output.take(), step_times
+
+    def shutdown(self) -> None:
+        self.executor.shutdown()
+
+def _discard(future) -> None:
+    """Free the output of a run whose caller has given up on it."""
+    if not future.cancelled() and future.exception() is None:
+        output, _ = future.result()
+        output.take()
@@ -1,97 +1,187 @@
 """Main module for image processing functionality."""
 
-from typing import List, Dict, Any, Type, Optional
+from typing import List, Dict, Any, Type, Optional, Iterable, Iterator, Tuple, Callable
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+import hashlib
+import importlib
+import json
+import threading
+import time
+import cv2
 import numpy as np
+from .batch import BatchItem, process_encoded, process_in_worker
+from .cache import LRUCache
+from .cancellation import Cancelled, CancellationToken
+from .cpu_budget import CpuBudget
+from .disk_cache import DiskCache
 from .operations.base import ImageOperation
-from .operations.color import (
-    GrayscaleOperation, BrightnessOperation, ContrastOperation,
-    SaturationOperation, HueOperation
-)
-from .operations.filters import BlurOperation, SharpenOperation
-from .operations.effects import SepiaOperation
-from .operations.transform import RotateOperation, FlipOperation
-from .operations.noise import AddNoiseOperation, DenoiseOperation
-from .operations.opencv import (
-    CannyEdgeOperation, AdaptiveThresholdOperation, ContourDrawOperation,
-    MorphologyOperation, CornerDetectionOperation, ColorSpaceOperation,
-    HistogramEqualizationOperation
-)
-from .operations.opencv_features import (
-    SIFTDetectionOperation, ORBDetectionOperation,
-    BlobDetectionOperation, GoodFeaturesToTrackOperation
-)
-from .operations.opencv_segmentation import (
-    WatershedSegmentationOperation, GrabCutSegmentationOperation,
-    KMeansSegmentationOperation, MeanShiftSegmentationOperation
-)
-from .operations.opencv_detection import (
-    HaarCascadeDetectionOperation, TemplateMatchingOperation,
-    BackgroundSubtractionOperation, OpticalFlowOperation
-)
+from .process_pool import ProcessPool, init_worker
+from .scheduler import Scheduler
+from .sessions import Session, SessionStore
+from .singleflight import SingleFlight
+from .tiling import process_tiled
 import logging
 
 logger = logging.getLogger(__name__)
 
+class PipelineStep:
+    """A unit of work produced by :meth:`ImageProcessor.compile_pipeline`.
+
+    A step covers one pipeline entry, or a run of consecutive pointwise
+    entries that are executed together as a single lookup-table pass.
+    """
+
+    def __init__(self, indices: List[int], operation_ids: List[str],
+                 params: List[Dict[str, Any]], pointwise: bool):
+        self.indices = indices
+        self.operation_ids = operation_ids
+        self.params = params
+        self.pointwise = pointwise
+
+    @property
+    def index(self) -> int:
+        """Position of the last pipeline entry covered by this step."""
+        return self.indices[-1]
+
+class PipelineResult:
+    """Output of :meth:`ImageProcessor.run_pipeline`."""
+
+    def __init__(self, image: np.ndarray, intermediate_results: Dict[int, np.ndarray],
+                 step_times: Dict[int, float], scale: float = 1.0, shared: bool = False):
+        self.image = image
+        self.intermediate_results = intermediate_results
+        self.step_times = step_times
+        # Size of the processed image relative to the input
+        self.scale = scale
+        # Whether the result was computed for another, identical request
+        self.shared = shared
+
+    @property
+    def processing_time(self) -> float:
+        """Total time spent in operations, in milliseconds."""
+        return sum(self.step_times.values())
+
+    def share(self) -> 'PipelineResult':
+        """Return a copy for another caller, with read-only image views."""
+        def read_only(image: np.ndarray) -> np.ndarray:
+            view = image.view()
+            view.flags.writeable = False
+            return view
+        
+        return PipelineResult(
+            read_only(self.image),
+            {i: read_only(step) for i, step in self.intermediate_results.items()},
+            dict(self.step_times), self.scale, shared=True
+        )
+
 class ImageProcessor:
     """Main class for managing image processing operations.
     
     This class handles the registration, instantiation, and execution of
     image processing operations. It maintains a registry of available
     operations and their instances for efficient reuse.
+    
+    Pipelines never mutate the shared instances: each step runs on a copy
+    bound to that step's parameters, so one processor can serve concurrent
+    requests.
     """
 
-    def __init__(self):
-        """Initialize the ImageProcessor with available operations."""
-        # Initialize available operations
-        self._operations: Dict[str, Type[ImageOperation]] = {
+    def __init__(self, cache_bytes: int = 512 * 1024 * 1024,
+                 session_bytes: int = 512 * 1024 * 1024, session_idle_timeout: float = 300,
+                 scheduler: Optional[Scheduler] = None, cpu: Optional[CpuBudget] = None,
+                 pool: Optional[ProcessPool] = None):
+        """Initialize the ImageProcessor with available operations.
+        
+        Args:
+            cache_bytes (int): Memory budget for cached intermediate results.
+            session_bytes (int): Memory budget for the state of stateful
+                operations across all streams.
+            session_idle_timeout (float): Seconds after which an unused
+                stream's state is dropped.
+            scheduler (Optional[Scheduler]): Orders runs that are given a
+                priority; a default one is created if omitted.
+            cpu (Optional[CpuBudget]): Counts concurrent runs, and sizes
+                OpenCV's thread pool from them if it was given
+                ``set_threads``; a default one, which only counts and
+                leaves OpenCV's threading alone, is created if omitted.
+            pool (Optional[ProcessPool]): Worker processes that runs without
+                previews, step callbacks or stateful operations are handed
+                to; everything runs in this process if omitted.
+        """
+        # Initialize available operations, referenced as 'module:Class' and
+        # imported on first use so startup and light workloads skip them
+        self._operations: Dict[str, str] = {
             # Basic operations
-            'brightness': BrightnessOperation,
-            'contrast': ContrastOperation,
-            'saturation': SaturationOperation,
-            'hue': HueOperation,
-            'blur': BlurOperation,
-            'sharpen': SharpenOperation,
-            'grayscale': GrayscaleOperation,
-            'sepia': SepiaOperation,
-            'rotate': RotateOperation,
-            'flip': FlipOperation,
-            'add_noise': AddNoiseOperation,
-            'denoise': DenoiseOperation,
+            'brightness': '.operations.color:BrightnessOperation',
+            'contrast': '.operations.color:ContrastOperation',
+            'saturation': '.operations.color:SaturationOperation',
+            'hue': '.operations.color:HueOperation',
+            'blur': '.operations.filters:BlurOperation',
+            'sharpen': '.operations.filters:SharpenOperation',
+            'grayscale': '.operations.color:GrayscaleOperation',
+            'sepia': '.operations.effects:SepiaOperation',
+            'rotate': '.operations.transform:RotateOperation',
+            'flip': '.operations.transform:FlipOperation',
+            'add_noise': '.operations.noise:AddNoiseOperation',
+            'denoise': '.operations.noise:DenoiseOperation',
             
             # OpenCV - Edge & Contour Detection
-            'canny_edge': CannyEdgeOperation,
-            'adaptive_threshold': AdaptiveThresholdOperation,
-            'contour_draw': ContourDrawOperation,
+            'canny_edge': '.operations.opencv:CannyEdgeOperation',
+            'adaptive_threshold': '.operations.opencv:AdaptiveThresholdOperation',
+            'contour_draw': '.operations.opencv:ContourDrawOperation',
             
             # OpenCV - Morphological Operations
-            'morphology': MorphologyOperation,
+            'morphology': '.operations.opencv:MorphologyOperation',
             
             # OpenCV - Feature Detection
-            'corner_detection': CornerDetectionOperation,
-            'sift_detection': SIFTDetectionOperation,
-            'orb_detection': ORBDetectionOperation,
-            'blob_detection': BlobDetectionOperation,
-            'good_features': GoodFeaturesToTrackOperation,
+            'corner_detection': '.operations.opencv:CornerDetectionOperation',
+            'sift_detection': '.operations.opencv_features:SIFTDetectionOperation',
+            'orb_detection': '.operations.opencv_features:ORBDetectionOperation',
+            'blob_detection': '.operations.opencv_features:BlobDetectionOperation',
+            'good_features': '.operations.opencv_features:GoodFeaturesToTrackOperation',
             
             # OpenCV - Segmentation
-            'watershed': WatershedSegmentationOperation,
-            'grabcut': GrabCutSegmentationOperation,
-            'kmeans_segment': KMeansSegmentationOperation,
-            'meanshift_segment': MeanShiftSegmentationOperation,
+            'watershed': '.operations.opencv_segmentation:WatershedSegmentationOperation',
+            'grabcut': '.operations.opencv_segmentation:GrabCutSegmentationOperation',
+            'kmeans_segment': '.operations.opencv_segmentation:KMeansSegmentationOperation',
+            'meanshift_segment': '.operations.opencv_segmentation:MeanShiftSegmentationOperation',
             
             # OpenCV - Object Detection
-            'haar_cascade': HaarCascadeDetectionOperation,
-            'template_matching': TemplateMatchingOperation,
-            'background_subtraction': BackgroundSubtractionOperation,
-            'optical_flow': OpticalFlowOperation,
+            'haar_cascade': '.operations.opencv_detection:HaarCascadeDetectionOperation',
+            'template_matching': '.operations.opencv_detection:TemplateMatchingOperation',
+            'background_subtraction': '.operations.opencv_detection:BackgroundSubtractionOperation',
+            'optical_flow': '.operations.opencv_detection:OpticalFlowOperation',
             
             # OpenCV - Color & Histogram
-            'color_space': ColorSpaceOperation,
-            'histogram_eq': HistogramEqualizationOperation
+            'color_space': '.operations.opencv:ColorSpaceOperation',
+            'histogram_eq': '.operations.opencv:HistogramEqualizationOperation'
         }
         
-        # Initialize operation instances cache
+        # Runs with a priority wait here for a slot
+        self.scheduler = scheduler or Scheduler()
+        
+        # OpenCV gets the cores that concurrent runs leave free
+        self.cpu = cpu or CpuBudget()
+        
+        # Identical pipelines running at the same time are computed once
+        self.flights = SingleFlight()
+        
+        # GIL-bound pipelines scale across cores on worker processes
+        self.pool = pool
+        
+        # Initialize operation classes and instances caches
+        self._classes: Dict[str, Type[ImageOperation]] = {}
         self._instances: Dict[str, ImageOperation] = {}
+        self._instances_lock = threading.Lock()
+        
+        # Intermediate results keyed by (image digest, pipeline prefix), so
+        # re-running an edited pipeline resumes after the unchanged steps
+        self._result_cache = LRUCache(cache_bytes)
+        
+        # State of stateful operations (background models, previous frames),
+        # kept separately for every stream of frames
+        self.sessions = SessionStore(session_bytes, session_idle_timeout)
         
     def get_available_operations(self) -> List[Dict[str, Any]]:
         """Get list of available operations and their metadata.
@@ -100,7 +190,7 @@ class ImageProcessor:
             List[Dict[str, Any]]: List of operation metadata dictionaries.
         """
         operations = []
-        for op_id, op_class in self._operations.items():
+        for op_id in self._operations:
             try:
                 instance = self._get_operation_instance(op_id)
                 operations.append({
@@ -111,6 +201,47 @@ class ImageProcessor:
                 logger.error(f"Error getting metadata for operation {op_id}: {str(e)}")
         return operations
 
+    def preload(self) -> Dict[str, float]:
+        """Instantiate every registered operation ahead of the first request.
+        
+        Resources operations otherwise load on first use, such as Haar
+        cascades, are loaded too (see :meth:`ImageOperation.load_resources`),
+        which gives the eager startup of a processor that loads everything
+        in its constructor.
+        
+        Operations that fail to load are logged and skipped; requests using
+        them fail as they would have anyway.
+        
+        Returns:
+            Dict[str, float]: Time taken to load each operation that
+                loaded, in milliseconds.
+        """
+        times = {}
+        for operation_id in self._operations:
+            start_time = time.perf_counter()
+            try:
+                self._get_operation_instance(operation_id).load_resources()
+            except Exception as e:
+                logger.warning(f"Could not preload {operation_id}: {str(e)}")
+                continue
+            times[operation_id] = (time.perf_counter() - start_time) * 1000
+        return times
+
+    def _operation_class(self, operation_id: str) -> Type[ImageOperation]:
+        """Import an operation's class on first use.
+        
+        Raises:
+            ValueError: If the operation_id is unknown.
+        """
+        operation_class = self._classes.get(operation_id)
+        if operation_class is None:
+            if operation_id not in self._operations:
+                raise ValueError(f"Unknown operation: {operation_id}")
+            module_name, class_name = self._operations[operation_id].split(':')
+            module = importlib.import_module(module_name, __package__)
+            operation_class = self._classes[operation_id] = getattr(module, class_name)
+        return operation_class
+
     def _get_operation_instance(self, operation_id: str) -> ImageOperation:
         """Get or create an operation instance.
         
@@ -126,37 +257,617 @@ class ImageProcessor:
         if operation_id not in self._instances:
             if operation_id not in self._operations:
                 raise ValueError(f"Unknown operation: {operation_id}")
-            self._instances[operation_id] = self._operations[operation_id]()
+            with self._instances_lock:
+                if operation_id not in self._instances:
+                    self._instances[operation_id] = self._operation_class(operation_id)()
         return self._instances[operation_id]
 
-    def process_pipeline(self, image: np.ndarray, pipeline: List[Dict[str, Any]]) -> np.ndarray:
-        """Process image through a pipeline of operations.
+    def bind_operation(self, operation_id: str, params: Dict[str, Any],
+                       session: Optional[Session] = None,
+                       cancel: Optional[CancellationToken] = None) -> ImageOperation:
+        """Get an operation bound to the given parameters.
+        
+        Args:
+            operation_id (str): The identifier of the operation.
+            params (Dict[str, Any]): Parameter values for this execution.
+            session (Optional[Session]): Stream session providing the state
+                of stateful operations.
+            cancel (Optional[CancellationToken]): Token the operation polls
+                while it runs.
+            
+        Returns:
+            ImageOperation: A private copy of the shared instance, safe to
+                use from the calling thread only.
+        """
+        operation = self._get_operation_instance(operation_id)
+        state = None
+        if operation.stateful and session is not None:
+            state = session.state_for(operation_id, operation)
+        return operation.bind(params, state, cancel)
+
+    def compile_pipeline(self, pipeline: List[Dict[str, Any]],
+                         barriers: Iterable[int] = ()) -> List[PipelineStep]:
+        """Compile a pipeline into executable steps.
+        
+        Unknown operations are skipped. Runs of consecutive pointwise
+        operations are merged into one step so they cost a single pass over
+        the image. A run never extends past an index listed in ``barriers``,
+        which keeps those intermediate results observable.
         
         Args:
-            image (np.ndarray): Input image to process.
             pipeline (List[Dict[str, Any]]): List of operations to apply.
+            barriers (Iterable[int]): Pipeline indices whose output must be
+                materialized, e.g. steps with previews enabled.
             
         Returns:
-            np.ndarray: The processed image.
+            List[PipelineStep]: The compiled steps in execution order.
         """
-        result = image.copy()
+        barriers = set(barriers)
+        steps: List[PipelineStep] = []
         
-        for step in pipeline:
-            operation_id = step['id']
-            params = step.get('params', {})
+        for i, entry in enumerate(pipeline):
+            operation_id = entry['id']
+            if operation_id not in self._operations:
+                logger.warning(f"Skipping unknown operation: {operation_id}")
+                continue
+            
+            params = entry.get('params', {})
+            pointwise = self._operation_class(operation_id).pointwise
+            previous = steps[-1] if steps else None
             
+            if (pointwise and previous is not None and previous.pointwise
+                    and previous.index not in barriers):
+                previous.indices.append(i)
+                previous.operation_ids.append(operation_id)
+                previous.params.append(params)
+            else:
+                steps.append(PipelineStep([i], [operation_id], [params], pointwise))
+        
+        return steps
+
+    def _apply_step(self, step: PipelineStep, image: np.ndarray,
+                    session: Optional[Session] = None,
+                    out: Optional[np.ndarray] = None,
+                    cancel: Optional[CancellationToken] = None) -> np.ndarray:
+        """Execute a compiled step on an image.
+        
+        Lookup-table steps write straight into ``out`` when it is given and
+        matches the image; other steps return a new array.
+        """
+        if step.pointwise and image.dtype == np.uint8:
+            # Push an identity ramp through every operation of the run, then
+            # apply the composed table to the image in a single pass.
+            channels = image.shape[2] if image.ndim == 3 else 1
+            table = np.arange(256, dtype=np.uint8).reshape(1, 256, 1)
+            table = np.repeat(table, channels, axis=2) if channels > 1 else table.reshape(1, 256)
+            for operation_id, params in zip(step.operation_ids, step.params):
+                table = self.bind_operation(operation_id, params).lookup_table(table)
+            if out is not None and out.shape == image.shape and out.dtype == image.dtype:
+                return cv2.LUT(image, table, dst=out)
+            return cv2.LUT(image, table)
+        
+        for operation_id, params in zip(step.operation_ids, step.params):
+            image = self.bind_operation(operation_id, params, session, cancel).process(image)
+        return image
+
+    def _prefix_keys(self, image_digest: str, steps: List[PipelineStep]) -> List[Optional[Tuple[str, str]]]:
+        """Build the result cache key for the output of each compiled step.
+        
+        Keys depend only on the operations and parameters up to the step, not
+        on how they were grouped, so a prefix stays cached when later steps
+        change. Steps after a non-cacheable operation get no key.
+        """
+        keys: List[Optional[Tuple[str, str]]] = []
+        prefix = hashlib.sha1()
+        cacheable = True
+        
+        for step in steps:
+            for operation_id, params in zip(step.operation_ids, step.params):
+                cacheable = cacheable and self._operation_class(operation_id).cacheable
+                prefix.update(json.dumps([operation_id, params], sort_keys=True, default=str).encode('utf-8'))
+            keys.append((image_digest, prefix.hexdigest()) if cacheable else None)
+        
+        return keys
+
+    def _resume_from_cache(self, steps: List[PipelineStep], keys: List[Optional[Tuple[str, str]]],
+                           preview_steps: set) -> Tuple[int, Optional[np.ndarray], Dict[int, np.ndarray]]:
+        """Find the longest cached pipeline prefix.
+        
+        Returns:
+            Tuple: Number of steps covered by the cache, the cached image
+                after those steps (None if nothing is cached) and the cached
+                intermediate results for preview steps within the prefix.
+        """
+        for count in range(len(steps), 0, -1):
+            if keys[count - 1] is None:
+                continue
+            image = self._result_cache.get(keys[count - 1])
+            if image is None:
+                continue
+            
+            intermediate_results = {}
+            for position in range(count - 1):
+                if steps[position].index in preview_steps:
+                    preview = self._result_cache.get(keys[position])
+                    if preview is None:
+                        break
+                    intermediate_results[steps[position].index] = preview
+            else:
+                if steps[count - 1].index in preview_steps:
+                    intermediate_results[steps[count - 1].index] = image
+                return count, image, intermediate_results
+        
+        return 0, None, {}
+
+    def estimate_cost(self, pipeline: List[Dict[str, Any]], shape: Tuple[int, ...]) -> float:
+        """Estimate the single-core time a pipeline takes on an image.
+        
+        Args:
+            pipeline (List[Dict[str, Any]]): List of operations to apply.
+            shape (Tuple[int, ...]): Shape of the input image; only the
+                height and width are used.
+            
+        Returns:
+            float: Estimated processing time in milliseconds.
+        """
+        megapixels = shape[0] * shape[1] / 1e6
+        cost = 0.0
+        for entry in pipeline:
+            operation_id = entry['id']
+            if operation_id not in self._operations:
+                continue
             try:
-                operation = self._get_operation_instance(operation_id)
-                operation.set_params(params)
-                result = operation.process(result)
-            except ValueError as e:
-                logger.warning(f"Skipping invalid operation: {str(e)}")
-            except Exception as e:
-                logger.error(f"Error processing operation {operation_id}: {str(e)}")
+                operation = self.bind_operation(operation_id, entry.get('params', {}))
+            except Exception:
+                # The step will fail before doing any work
+                continue
+            cost += operation.estimate_cost(megapixels)
+        return cost
+
+    def result_key(self, image_digest: str, pipeline: List[Dict[str, Any]],
+                   variant: str = '') -> Optional[str]:
+        """Content address of a pipeline's output for persistent caches.
+        
+        The key covers the input digest, the pipeline with parameters filled
+        in from the defaults, the version of every operation and ``variant``
+        (e.g. the output encoding), so it changes whenever the output could.
+        
+        Args:
+            image_digest (str): Stable identifier of the input image.
+            pipeline (List[Dict[str, Any]]): List of operations to apply.
+            variant (str): Anything else the stored result depends on.
+            
+        Returns:
+            Optional[str]: The key, or None if the pipeline contains an
+                operation whose results must not be cached.
+        """
+        canonical = []
+        for entry in pipeline:
+            operation_id = entry['id']
+            if operation_id not in self._operations:
+                continue
+            operation_class = self._operation_class(operation_id)
+            if not operation_class.cacheable:
+                return None
+            defaults = self._get_operation_instance(operation_id).default_params()
+            params = {**defaults, **{k: v for k, v in entry.get('params', {}).items() if k in defaults}}
+            canonical.append([operation_id, operation_class.version, params])
+        
+        payload = json.dumps([image_digest, canonical, variant], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def run_pipeline(self, image: np.ndarray, pipeline: List[Dict[str, Any]],
+                     preview_steps: Iterable[int] = (),
+                     image_digest: Optional[str] = None,
+                     on_step: Optional[Callable[[int, np.ndarray], None]] = None,
+                     stream_id: Optional[str] = None,
+                     out: Optional[np.ndarray] = None,
+                     cancel: Optional[CancellationToken] = None,
+                     priority: Optional[str] = None) -> PipelineResult:
+        """Process image through a pipeline, collecting timings and previews.
+        
+        When ``image_digest`` is given, the output of every step is cached
+        under the digest and the pipeline prefix that produced it, and
+        execution resumes from the longest cached prefix. Concurrent calls
+        for the same digest, pipeline and previews run only once; the other
+        callers get a :meth:`PipelineResult.share` of the result, and their
+        ``on_step`` is called with its previews and final image once it is
+        ready.
+        
+        The input is never modified or copied up front, so ``image`` may be a
+        read-only ``np.memmap`` of an uncompressed frame.
+        
+        Args:
+            image (np.ndarray): Input image to process.
+            pipeline (List[Dict[str, Any]]): List of operations to apply.
+            preview_steps (Iterable[int]): Pipeline indices whose intermediate
+                results should be returned.
+            image_digest (Optional[str]): Stable identifier of the input
+                image, e.g. a hash of the uploaded file.
+            on_step (Optional[Callable[[int, np.ndarray], None]]): Called
+                with the pipeline index and output of each completed step.
+                Steps that are not computed by this call, because they were
+                restored from the cache or run for another caller, are
+                reported only by their last one and any previews.
+            stream_id (Optional[str]): Identifier of the stream of frames
+                this image belongs to. Stateful operations keep separate
+                state per stream; images without one share a default stream.
+            out (Optional[np.ndarray]): Destination for the final image,
+                e.g. a writable ``np.memmap``. Must match the result's shape
+                and dtype.
+            cancel (Optional[CancellationToken]): Token checked between
+                steps and inside long-running operations.
+            priority (Optional[str]): Scheduler class (see
+                :class:`Scheduler`) to wait for a slot in before running;
+                steps of capped operations also wait for their caps. Runs
+                without one start immediately.
+            
+        Returns:
+            PipelineResult: The processed image, requested intermediate
+                results and per-step processing times in milliseconds.
+            
+        Raises:
+            Cancelled: If ``cancel`` was cancelled before the run finished.
+        """
+        preview_steps = set(preview_steps)
+        
+        def execute():
+            slot = nullcontext() if priority is None else self.scheduler.slot(priority, cancel)
+            with slot as run:
+                return self._execute_pipeline(image, pipeline, preview_steps, image_digest,
+                                              on_step, stream_id, out, cancel, run)
+        
+        flight_key = None
+        if image_digest is not None and out is None:
+            flight_key = self.result_key(image_digest, pipeline, json.dumps(sorted(preview_steps)))
+        if flight_key is None:
+            return execute()
+        
+        try:
+            result, shared = self.flights.do(flight_key, execute)
+        except Cancelled:
+            if cancel is not None and cancel.cancelled:
                 raise
+            # The run this call was sharing was cancelled by its own caller
+            return execute()
+        if not shared:
+            return result
+        
+        result = result.share()
+        if on_step is not None:
+            steps = self.compile_pipeline(pipeline)
+            for index, step_result in sorted(result.intermediate_results.items()):
+                on_step(index, step_result)
+            if steps and steps[-1].index not in result.intermediate_results:
+                on_step(steps[-1].index, result.image)
+        return result
+
+    def _execute_pipeline(self, image: np.ndarray, pipeline: List[Dict[str, Any]],
+                          preview_steps: set, image_digest: Optional[str],
+                          on_step: Optional[Callable[[int, np.ndarray], None]],
+                          stream_id: Optional[str], out: Optional[np.ndarray],
+                          cancel: Optional[CancellationToken], run=None) -> PipelineResult:
+        """Run a pipeline for :meth:`run_pipeline`.
+        
+        ``run`` is the scheduler ticket of the run, if it has one; each step
+        then holds the caps of its operations while it executes. Steps
+        executed here count against the CPU budget; runs handed to the
+        process pool do not, as they use another process's cores.
+        """
+        def caps(operation_ids):
+            return nullcontext() if run is None else self.scheduler.step(run, operation_ids, cancel)
+        
+        steps = self.compile_pipeline(pipeline, barriers=preview_steps)
+        step_times: Dict[int, float] = {}
+        
+        if image_digest is not None:
+            keys = self._prefix_keys(image_digest, steps)
+            resume, result, intermediate_results = self._resume_from_cache(steps, keys, preview_steps)
+        else:
+            keys = [None] * len(steps)
+            resume, result, intermediate_results = 0, None, {}
+        
+        if result is None and self._runs_in_pool(steps, preview_steps, out):
+            # The worker runs every step, so it holds all of their caps
+            with caps([operation_id for step in steps for operation_id in step.operation_ids]):
+                result, step_times = self.pool.run_pipeline(image, pipeline, cancel)
+            if keys[-1] is not None:
+                result.flags.writeable = False
+                self._result_cache.put(keys[-1], result)
+            if on_step is not None:
+                on_step(steps[-1].index, result)
+            return PipelineResult(result, intermediate_results, step_times)
+        
+        if result is None:
+            # Operations never write to their input, so no defensive copy
+            result = image
+        elif on_step is not None:
+            on_step(steps[resume - 1].index, result)
+        
+        # Only pipelines with stateful operations need the stream's session
+        stateful = any(
+            self._operation_class(operation_id).stateful
+            for step in steps[resume:] for operation_id in step.operation_ids
+        )
+        
+        with self.sessions.open(stream_id) if stateful else nullcontext() as session:
+            for step, key in zip(steps[resume:], keys[resume:]):
+                if cancel is not None:
+                    cancel.check()
+                try:
+                    with caps(step.operation_ids), self.cpu.run():
+                        start_time = time.perf_counter()
+                        result = self._apply_step(step, result, session, out if step is steps[-1] else None, cancel)
+                        step_times[step.index] = (time.perf_counter() - start_time) * 1000
+                except Cancelled:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error processing operation {'+'.join(step.operation_ids)}: {str(e)}")
+                    raise
+                
+                if key is not None and result is not out:
+                    # Cached arrays are shared between requests
+                    if result is image:
+                        result = image.copy()
+                    result.flags.writeable = False
+                    self._result_cache.put(key, result)
+                
+                if step.index in preview_steps:
+                    intermediate_results[step.index] = result
+                
+                if on_step is not None:
+                    on_step(step.index, result)
+        
+        if out is not None:
+            if result is not out:
+                np.copyto(out, result)
+            result = out
+        elif result is image:
+            # Never hand the caller's input back as the result
+            result = image.copy()
+        
+        return PipelineResult(result, intermediate_results, step_times)
+
+    def _runs_in_pool(self, steps: List[PipelineStep], preview_steps: set,
+                      out: Optional[np.ndarray]) -> bool:
+        """Whether a run can be handed to the process pool as a whole.
+        
+        Workers only return the final image, and have no access to this
+        process's stream sessions or destination arrays. Step callbacks are
+        told about the last step only, as for a run restored from the cache.
+        """
+        if self.pool is None or not steps or preview_steps or out is not None:
+            return False
+        return not any(self._operation_class(operation_id).stateful
+                       for step in steps for operation_id in step.operation_ids)
+
+    def scale_pipeline(self, pipeline: List[Dict[str, Any]], factor: float) -> List[Dict[str, Any]]:
+        """Rescale resolution-dependent parameters for an image resized by ``factor``.
+        
+        Args:
+            pipeline (List[Dict[str, Any]]): List of operations to apply.
+            factor (float): Size of the resized image relative to the original.
             
+        Returns:
+            List[Dict[str, Any]]: A copy of the pipeline with adjusted
+                parameters; unknown operations are kept as they are.
+        """
+        scaled = []
+        for entry in pipeline:
+            if entry['id'] in self._operations:
+                operation = self.bind_operation(entry['id'], entry.get('params', {}))
+                entry = {**entry, 'params': operation.scaled_params(factor)}
+            scaled.append(entry)
+        return scaled
+
+    def run_preview(self, image: np.ndarray, pipeline: List[Dict[str, Any]], max_edge: int = 1024,
+                    preview_steps: Iterable[int] = (),
+                    image_digest: Optional[str] = None,
+                    on_step: Optional[Callable[[int, np.ndarray], None]] = None,
+                    cancel: Optional[CancellationToken] = None,
+                    priority: Optional[str] = None,
+                    image_scale: float = 1.0,
+                    stream_id: Optional[str] = None) -> PipelineResult:
+        """Process a downscaled proxy of an image for interactive previews.
+        
+        The image is shrunk so its long edge is at most ``max_edge`` pixels
+        and pixel-sized parameters (blur radius, kernel sizes, margins,
+        areas, ...) are scaled to match, so the proxy looks like the
+        full-resolution result.
+        
+        ``image`` may itself be a reduced decode of the original (see
+        :func:`.codec.decode_reduced`); parameters are then scaled relative
+        to the original, and its size becomes part of the cache key.
+        
+        Stateful operations keep the proxies of a stream, or of images
+        without one, in a session of their own per ``max_edge``: their
+        state depends on the resolution, and the stream's full-resolution
+        session is left to the frames processed at full size, e.g. by a
+        refinement job.
+        
+        Args:
+            image (np.ndarray): Input image to process.
+            pipeline (List[Dict[str, Any]]): List of operations to apply.
+            max_edge (int): Maximum long edge of the proxy in pixels.
+            preview_steps (Iterable[int]): Pipeline indices whose intermediate
+                results should be returned.
+            image_digest (Optional[str]): Stable identifier of the input
+                image, used for the result cache.
+            on_step (Optional[Callable[[int, np.ndarray], None]]): Called
+                with the pipeline index and output of each completed step.
+            cancel (Optional[CancellationToken]): Token checked between and
+                within steps.
+            priority (Optional[str]): Scheduler class of the run.
+            image_scale (float): Size of ``image`` relative to the original
+                image the pipeline's parameters refer to.
+            stream_id (Optional[str]): Identifier of the stream of frames
+                this image belongs to, see :meth:`run_pipeline`.
+            
+        Returns:
+            PipelineResult: The processed proxy; ``scale`` gives its size
+                relative to the original.
+        """
+        height, width = image.shape[:2]
+        factor = min(1.0, max_edge / max(height, width))
+        
+        if image_digest is not None and image_scale != 1.0:
+            # A reduced decode differs slightly from a downscaled full one
+            image_digest = f'{image_digest}~{width}x{height}'
+        
+        if factor < 1.0:
+            size = (max(1, round(width * factor)), max(1, round(height * factor)))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+            if image_digest is not None:
+                image_digest = f'{image_digest}@{max_edge}'
+        
+        factor *= image_scale
+        if factor < 1.0:
+            pipeline = self.scale_pipeline(pipeline, factor)
+        
+        stream_id = f'{stream_id or ""}@{max_edge}'
+        
+        result = self.run_pipeline(image, pipeline, preview_steps, image_digest, on_step,
+                                   stream_id=stream_id, cancel=cancel, priority=priority)
+        result.scale = factor
         return result
 
+    def process_pipeline(self, image: np.ndarray, pipeline: List[Dict[str, Any]],
+                         out: Optional[np.ndarray] = None,
+                         cancel: Optional[CancellationToken] = None) -> np.ndarray:
+        """Process image through a pipeline of operations.
+        
+        Args:
+            image (np.ndarray): Input image to process, e.g. an ``np.memmap``
+                opened with :mod:`.rawio`.
+            pipeline (List[Dict[str, Any]]): List of operations to apply.
+            out (Optional[np.ndarray]): Destination for the result, e.g. a
+                writable ``np.memmap``; a new array is returned if omitted.
+            cancel (Optional[CancellationToken]): Token checked between
+                steps and inside long-running operations.
+            
+        Returns:
+            np.ndarray: The processed image (``out`` if given).
+            
+        Raises:
+            Cancelled: If ``cancel`` was cancelled before the run finished.
+        """
+        return self.run_pipeline(image, pipeline, out=out, cancel=cancel).image
+
+    def process_tiled(self, source: np.ndarray, pipeline: List[Dict[str, Any]],
+                      out: Optional[np.ndarray] = None, tile_size: int = 1024) -> np.ndarray:
+        """Process a large image tile by tile.
+        
+        Every operation in the pipeline must be tileable. Tiles are read with
+        enough overlap for the whole pipeline's neighbourhood, so the result
+        matches :meth:`process_pipeline` (up to off-by-one rounding in some
+        OpenCV color conversions, whose vectorized and scalar code paths
+        round differently) while peak memory stays at a few tiles.
+        
+        Args:
+            source (np.ndarray): Input image, e.g. an ``np.memmap``.
+            pipeline (List[Dict[str, Any]]): List of operations to apply.
+            out (Optional[np.ndarray]): Destination array, e.g. an
+                ``np.memmap``; allocated if omitted.
+            tile_size (int): Edge length of the output tiles in pixels.
+            
+        Returns:
+            np.ndarray: The processed image.
+            
+        Raises:
+            ValueError: If an operation cannot be processed in tiles.
+        """
+        steps = self.compile_pipeline(pipeline)
+        
+        # Overlaps add up: each step needs correct input for its own halo
+        halo = 0
+        for step in steps:
+            for operation_id, params in zip(step.operation_ids, step.params):
+                operation = self.bind_operation(operation_id, params)
+                if not operation.tileable:
+                    raise ValueError(f"Operation cannot be processed in tiles: {operation_id}")
+                halo += operation.halo()
+        
+        def apply(tile: np.ndarray) -> np.ndarray:
+            for step in steps:
+                tile = self._apply_step(step, tile)
+            return tile
+        
+        return process_tiled(apply, source, halo, out, tile_size)
+
+    def process_batch(self, images: Iterable[bytes], pipeline: List[Dict[str, Any]],
+                      max_workers: Optional[int] = None, use_processes: bool = False,
+                      ordered: bool = True, extension: str = '.png',
+                      result_cache: Optional[DiskCache] = None,
+                      priority: Optional[str] = None,
+                      max_edge: int = 0) -> Iterator[BatchItem]:
+        """Process many encoded images through the same pipeline concurrently.
+        
+        Each image is decoded, processed and encoded on a worker. Thread
+        workers share this processor; process workers build their own from
+        the same operation registry when they start. Images cross to
+        process workers encoded, which is smaller than sharing the decoded
+        frames.
+        
+        Args:
+            images (Iterable[bytes]): Encoded input images.
+            pipeline (List[Dict[str, Any]]): List of operations to apply.
+            max_workers (Optional[int]): Pool size, defaults to the CPU count.
+            use_processes (bool): Use a process pool instead of threads:
+                :attr:`pool` if the processor has one and ``max_workers``
+                is not given, otherwise a pool started for this batch.
+            ordered (bool): Yield results in input order rather than as they
+                finish.
+            extension (str): Output format as a file extension.
+            result_cache (Optional[DiskCache]): Persistent cache of encoded
+                results; hits are returned without being processed and new
+                results are stored.
+            priority (Optional[str]): Scheduler class for images processed
+                on threads; process workers are not scheduled.
+            max_edge (int): Process a proxy of each image with at most this
+                long edge, decoded at reduced resolution where possible
+                (0 processes full resolution).
+            
+        Yields:
+            BatchItem: The encoded result, or the error, for each image.
+        """
+        if use_processes and self.pool is not None and max_workers is None:
+            # Reuse the warm workers, which outlive the batch
+            pool = nullcontext(self.pool.executor)
+        elif use_processes:
+            pool = ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker)
+        else:
+            pool = ThreadPoolExecutor(max_workers=max_workers)
+        
+        with pool as executor:
+            entries = []
+            for i, data in enumerate(images):
+                key = None
+                if result_cache is not None:
+                    variant = f'{extension}@{max_edge}' if max_edge else extension
+                    key = self.result_key(hashlib.sha1(data).hexdigest(), pipeline, variant)
+                    cached = result_cache.get(key) if key is not None else None
+                    if cached is not None:
+                        entries.append((BatchItem(i, cached, cached=True), key))
+                        continue
+                
+                if use_processes:
+                    future = executor.submit(process_in_worker, i, data, pipeline, extension, max_edge)
+                else:
+                    future = executor.submit(process_encoded, self, i, data, pipeline, extension, priority,
+                                             max_edge)
+                entries.append((future, key))
+            
+            if not ordered:
+                hits = [(item, key) for item, key in entries if isinstance(item, BatchItem)]
+                keys = {future: key for future, key in entries if not isinstance(future, BatchItem)}
+                entries = hits + [(future, keys[future]) for future in as_completed(keys)]
+            
+            for entry, key in entries:
+                item = entry if isinstance(entry, BatchItem) else entry.result()
+                if key is not None and item.success and not item.cached:
+                    result_cache.put(key, item.data)
+                yield item
+
     def get_operation_params(self, operation_id: str) -> Dict[str, Any]:
         """Get current parameters for an operation.
         
@@ -169,6 +880,40 @@ class ImageProcessor:
         operation = self._get_operation_instance(operation_id)
         return operation.get_params()
 
+    def operation_catalog(self) -> List[Dict[str, Any]]:
+        """Describe every registered operation for clients.
+        
+        Entries are generated from the operation classes and their
+        ``param_schema``, so they cannot drift from what the processor
+        accepts. Operations that cannot be instantiated in this environment
+        are left out.
+        
+        Returns:
+            List[Dict[str, Any]]: One entry per operation, in registry order.
+        """
+        catalog = []
+        for operation_id in self._operations:
+            try:
+                operation_class = self._operation_class(operation_id)
+                operation = self._get_operation_instance(operation_id)
+            except Exception as e:
+                logger.warning(f"Leaving {operation_id} out of the catalog: {str(e)}")
+                continue
+            
+            entry = {
+                'id': operation_id,
+                'name': operation.name,
+                'description': operation.description,
+                'icon': operation.icon,
+                'category': operation_class.category
+            }
+            if operation_class.subcategory is not None:
+                entry['subcategory'] = operation_class.subcategory
+            entry['params'] = operation.param_schema()
+            catalog.append(entry)
+        
+        return catalog
+
     def get_operation_schema(self, operation_id: str) -> Dict[str, Dict[str, Any]]:
         """Get parameter schema for an operation.
         
@@ -0,0 +1,59 @@
+"""Memory-mapped access to uncompressed frames stored as raw or NPY files."""
+
+from typing import Tuple, Union
+import numpy as np
+
+def open_npy(path: str, writable: bool = False) -> np.ndarray:
+    """Map an existing ``.npy`` file without reading it into memory.
+
+    Args:
+        path (str): Path of the ``.npy`` file.
+        writable (bool): Map read-write so results can be stored in place.
+
+    Returns:
+        np.ndarray: A memory-mapped array backed by the file.
+    """
+    return np.load(path, mmap_mode='r+' if writable else 'r')
+
+def create_npy(path: str, shape: Tuple[int, ...], dtype: Union[str, np.dtype] = np.uint8) -> np.ndarray:
+    """Create a ``.npy`` file of the given shape and map it for writing.
+
+    Args:
+        path (str): Path of the file to create.
+        shape (Tuple[int, ...]): Array shape, e.g. (height, width, 3).
+        dtype (Union[str, np.dtype]): Element type.
+
+    Returns:
+        np.ndarray: A writable memory-mapped array backed by the file.
+    """
+    return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+def open_raw(path: str, shape: Tuple[int, ...], dtype: Union[str, np.dtype] = np.uint8,
+             offset: int = 0, writable: bool = False) -> np.memmap:
+    """Map a headerless raw frame dump.
+
+    Args:
+        path (str): Path of the raw file.
+        shape (Tuple[int, ...]): Frame shape, e.g. (height, width, 3).
+        dtype (Union[str, np.dtype]): Element type.
+        offset (int): Byte offset of the frame within the file, e.g.
+            ``index * frame_bytes`` for multi-frame dumps.
+        writable (bool): Map read-write so results can be stored in place.
+
+    Returns:
+        np.memmap: A memory-mapped array backed by the file.
+    """
+    return np.memmap(path, dtype=dtype, mode='r+' if writable else 'r', offset=offset, shape=shape)
+
+def create_raw(path: str, shape: Tuple[int, ...], dtype: Union[str, np.dtype] = np.uint8) -> np.memmap:
+    """Create a headerless raw file of the given shape and map it for writing.
+
+    Args:
+        path (str): Path of the file to create.
+        shape (Tuple[int, ...]): Frame shape, e.g. (height, width, 3).
+        dtype (Union[str, np.dtype]): Element type.
+
+    Returns:
+        np.memmap: A writable memory-mapped array backed by the file.
+    """
+    return np.memmap(path, dtype=dtype, mode='w+', shape=shape)
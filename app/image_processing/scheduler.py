@@ -0,0 +1,193 @@
+"""Priority admission of pipeline runs with per-operation concurrency caps."""
+
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import itertools
+import os
+import threading
+import time
+from .cancellation import CancellationToken
+
+class _Ticket:
+    """A run waiting for, or holding, a slot."""
+
+    def __init__(self, priority: str, rank: int, seq: int):
+        self.priority = priority
+        self.order = (rank, seq)
+        # Capped operations the run needs to continue
+        self.operations = set()
+        self.running = False
+        self.enqueued = time.monotonic()
+
+class Scheduler:
+    """Runs pipelines in priority order with bounded concurrency.
+
+    At most ``max_concurrent`` runs execute at once. Waiting runs start in
+    order of their priority class, then arrival. Steps that execute an
+    operation listed in ``operation_limits`` also need one of that
+    operation's slots for as long as the step runs (see :meth:`step`). A run
+    blocked on such a cap gives its slot up meanwhile and lets later runs
+    overtake it, so a burst of heavy pipelines cannot hold up cheap ones.
+
+    Args:
+        max_concurrent (Optional[int]): Runs executing at once, defaults to
+            the CPU count (at least 4).
+        operation_limits (Optional[Dict[str, int]]): Concurrent steps allowed
+            per operation ID.
+    """
+
+    PREVIEW = 'preview'
+    FINAL = 'final'
+    BATCH = 'batch'
+    PRIORITIES = (PREVIEW, FINAL, BATCH)
+
+    DEFAULT_OPERATION_LIMITS = {'grabcut': 2, 'denoise': 2}
+
+    def __init__(self, max_concurrent: Optional[int] = None,
+                 operation_limits: Optional[Dict[str, int]] = None):
+        self.max_concurrent = max_concurrent or max(4, os.cpu_count() or 1)
+        self.operation_limits = dict(self.DEFAULT_OPERATION_LIMITS if operation_limits is None
+                                     else operation_limits)
+        self._waiting: List[_Ticket] = []
+        self._running = 0
+        self._operation_counts = {operation_id: 0 for operation_id in self.operation_limits}
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._stats = {
+            priority: {'running': 0, 'started': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+            for priority in self.PRIORITIES
+        }
+
+    @contextmanager
+    def slot(self, priority: str, cancel: Optional[CancellationToken] = None) -> Iterator[_Ticket]:
+        """Wait for a slot for a run and hold it.
+
+        Args:
+            priority (str): One of :data:`PRIORITIES`.
+            cancel (Optional[CancellationToken]): Stops waiting when
+                cancelled.
+
+        Yields:
+            _Ticket: The run's ticket, to pass to :meth:`step`.
+
+        Raises:
+            ValueError: If ``priority`` is not a known class.
+            Cancelled: If ``cancel`` is cancelled while waiting.
+        """
+        if priority not in self.PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        ticket = _Ticket(priority, self.PRIORITIES.index(priority), next(self._seq))
+
+        with self._condition:
+            self._wait_for_turn(ticket, cancel)
+            wait = (time.monotonic() - ticket.enqueued) * 1000
+            entry = self._stats[priority]
+            entry['started'] += 1
+            entry['total_wait'] += wait
+            entry['max_wait'] = max(entry['max_wait'], wait)
+
+        try:
+            yield ticket
+        finally:
+            with self._condition:
+                if ticket.running:
+                    self._stop(ticket)
+                self._condition.notify_all()
+
+    @contextmanager
+    def step(self, ticket: _Ticket, operation_ids: Iterable[str],
+             cancel: Optional[CancellationToken] = None) -> Iterator[None]:
+        """Hold the caps of the operations a step of a run executes.
+
+        If a cap is taken, the run gives its slot up and queues again with
+        its original place in line until both are free.
+
+        Args:
+            ticket (_Ticket): The run, as yielded by :meth:`slot`.
+            operation_ids (Iterable[str]): Operations the step executes.
+            cancel (Optional[CancellationToken]): Stops waiting when
+                cancelled.
+
+        Raises:
+            Cancelled: If ``cancel`` is cancelled while waiting.
+        """
+        capped = {operation_id for operation_id in operation_ids if operation_id in self.operation_limits}
+        if not capped:
+            yield
+            return
+
+        with self._condition:
+            ticket.operations = capped
+            if not self._runnable(ticket):
+                self._stop(ticket)
+                self._condition.notify_all()
+                try:
+                    self._wait_for_turn(ticket, cancel)
+                except BaseException:
+                    ticket.operations = set()
+                    raise
+            for operation_id in capped:
+                self._operation_counts[operation_id] += 1
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                for operation_id in capped:
+                    self._operation_counts[operation_id] -= 1
+                ticket.operations = set()
+                self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return queue depth, running count and wait times per priority class."""
+        with self._condition:
+            stats = {}
+            for priority in self.PRIORITIES:
+                entry = self._stats[priority]
+                started = entry['started']
+                stats[priority] = {
+                    'queued': sum(1 for ticket in self._waiting if ticket.priority == priority),
+                    'running': entry['running'],
+                    'started': started,
+                    'avg_wait_ms': round(entry['total_wait'] / started, 2) if started else 0.0,
+                    'max_wait_ms': round(entry['max_wait'], 2)
+                }
+            stats['operations'] = dict(self._operation_counts)
+            return stats
+
+    def _runnable(self, ticket: _Ticket) -> bool:
+        return all(self._operation_counts[operation_id] < self.operation_limits[operation_id]
+                   for operation_id in ticket.operations)
+
+    def _may_start(self, ticket: _Ticket) -> bool:
+        """Whether ``ticket`` is the first runnable ticket and a slot is free."""
+        if self._running >= self.max_concurrent or not self._runnable(ticket):
+            return False
+        return not any(other.order < ticket.order and self._runnable(other) for other in self._waiting)
+
+    def _wait_for_turn(self, ticket: _Ticket, cancel: Optional[CancellationToken]) -> None:
+        """Queue ``ticket`` until it may run, then count it as running."""
+        self._waiting.append(ticket)
+        try:
+            while not self._may_start(ticket):
+                if cancel is not None:
+                    cancel.check()
+                    # Wake up regularly to notice cancellation
+                    self._condition.wait(0.05)
+                else:
+                    self._condition.wait()
+        except BaseException:
+            self._waiting.remove(ticket)
+            self._condition.notify_all()
+            raise
+        self._waiting.remove(ticket)
+        self._running += 1
+        self._stats[ticket.priority]['running'] += 1
+        ticket.running = True
+        # Runs queued behind this one may be able to start as well
+        self._condition.notify_all()
+
+    def _stop(self, ticket: _Ticket) -> None:
+        self._running -= 1
+        self._stats[ticket.priority]['running'] -= 1
+        ticket.running = False
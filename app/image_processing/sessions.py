@@ -0,0 +1,100 @@
+"""Per-stream state for stateful operations."""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+import logging
+import threading
+import time
+from .operations.base import ImageOperation
+
+logger = logging.getLogger(__name__)
+
+class Session:
+    """State of every stateful operation used by one stream of frames."""
+
+    def __init__(self, stream_id: Optional[str]):
+        self.stream_id = stream_id
+        self.last_used = time.monotonic()
+        self.nbytes = 0
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._operations: Dict[str, ImageOperation] = {}
+        # Frames of one stream are processed in order
+        self.lock = threading.Lock()
+
+    def state_for(self, operation_id: str, operation: ImageOperation) -> Dict[str, Any]:
+        """Return this stream's state for an operation, creating it if needed."""
+        if operation_id not in self._states:
+            self._states[operation_id] = operation.create_state()
+            self._operations[operation_id] = operation
+        return self._states[operation_id]
+
+    def measure(self) -> int:
+        """Recompute and return the memory held by this session's state."""
+        self.nbytes = sum(
+            self._operations[operation_id].state_nbytes(state)
+            for operation_id, state in self._states.items()
+        )
+        return self.nbytes
+
+class SessionStore:
+    """Registry of stream sessions with idle eviction and a memory bound.
+
+    Sessions unused for ``idle_timeout`` seconds are dropped, and the least
+    recently used ones are dropped whenever the total state exceeds
+    ``max_bytes``. Frames without a stream ID share a default session,
+    evicted like any other; clients that need their state kept apart from
+    other clients' should send a stream ID.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, idle_timeout: float = 300):
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+        # The default session is stored under None
+        self._sessions: 'OrderedDict[Optional[str], Session]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def open(self, stream_id: Optional[str]) -> Iterator[Session]:
+        """Hold a stream's session for the duration of one pipeline run."""
+        session = self._get(stream_id)
+        with session.lock:
+            try:
+                yield session
+            finally:
+                session.last_used = time.monotonic()
+                session.measure()
+        self._evict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def nbytes(self) -> int:
+        """Total memory held by all sessions."""
+        with self._lock:
+            return sum(s.nbytes for s in self._sessions.values())
+
+    def _get(self, stream_id: Optional[str]) -> Session:
+        with self._lock:
+            session = self._sessions.get(stream_id)
+            if session is None:
+                session = self._sessions[stream_id] = Session(stream_id)
+            self._sessions.move_to_end(stream_id)
+            return session
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for stream_id in [
+                stream_id for stream_id, session in self._sessions.items()
+                if now - session.last_used > self.idle_timeout
+            ]:
+                logger.info(f"Evicting idle stream session: {stream_id}")
+                del self._sessions[stream_id]
+
+            total = sum(s.nbytes for s in self._sessions.values())
+            while total > self.max_bytes and self._sessions:
+                stream_id, session = self._sessions.popitem(last=False)
+                logger.info(f"Evicting stream session over memory budget: {stream_id}")
+                total -= session.nbytes
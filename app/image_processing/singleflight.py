@@ -0,0 +1,69 @@
+"""Deduplication of identical computations that are in flight at once."""
+
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import threading
+
+class _Call:
+    """A computation in progress and the outcome its callers wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """Runs concurrent calls with the same key only once.
+
+    The first caller for a key executes the function; callers arriving while
+    it runs wait for it and receive the same result, or the same exception.
+    Nothing is kept once the call finishes, so later callers compute afresh
+    (or hit whatever cache the function itself uses).
+    """
+
+    def __init__(self):
+        self.executions = 0
+        self.shared = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Call ``function`` unless a call for ``key`` is already running.
+
+        Returns:
+            Tuple[Any, bool]: The result and whether it came from another
+                caller's execution.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> Dict[str, int]:
+        """Return how many calls executed and how many shared a result."""
+        with self._lock:
+            return {
+                'executions': self.executions,
+                'shared': self.shared,
+                'in_flight': len(self._calls)
+            }
@@ -0,0 +1,49 @@
+"""Tile-by-tile execution of pipelines on very large images."""
+
+from typing import Callable, Iterator, Optional, Tuple
+import numpy as np
+
+def iter_tiles(height: int, width: int, tile_size: int) -> Iterator[Tuple[int, int, int, int]]:
+    """Yield (top, left, bottom, right) bounds covering an image in row order."""
+    for top in range(0, height, tile_size):
+        for left in range(0, width, tile_size):
+            yield top, left, min(top + tile_size, height), min(left + tile_size, width)
+
+def process_tiled(apply: Callable[[np.ndarray], np.ndarray], source: np.ndarray, halo: int,
+                  out: Optional[np.ndarray] = None, tile_size: int = 1024) -> np.ndarray:
+    """Run ``apply`` over an image one tile at a time.
+
+    Each tile is read with ``halo`` extra pixels on every side that lies
+    inside the image, processed, and trimmed back before being written, so
+    neighbourhood operations give the same result as on the whole image.
+    Only the tiles being worked on are ever held in memory, which lets
+    ``source`` and ``out`` be memory-mapped arrays larger than RAM.
+
+    Args:
+        apply (Callable[[np.ndarray], np.ndarray]): Processes one tile.
+        source (np.ndarray): Input image, possibly an ``np.memmap``.
+        halo (int): Overlap in pixels required around each tile.
+        out (Optional[np.ndarray]): Destination with the same height and
+            width as ``source``; allocated from the first tile if omitted.
+        tile_size (int): Edge length of the output tiles in pixels.
+
+    Returns:
+        np.ndarray: The destination image.
+    """
+    height, width = source.shape[:2]
+
+    for top, left, bottom, right in iter_tiles(height, width, tile_size):
+        read_top, read_left = max(top - halo, 0), max(left - halo, 0)
+        read_bottom, read_right = min(bottom + halo, height), min(right + halo, width)
+
+        tile = np.ascontiguousarray(source[read_top:read_bottom, read_left:read_right])
+        result = apply(tile)
+        core = result[top - read_top:bottom - read_top, left - read_left:right - read_left]
+
+        if out is None:
+            out = np.empty((height, width) + core.shape[2:], dtype=core.dtype)
+        out[top:bottom, left:right] = core
+
+    if hasattr(out, 'flush'):
+        out.flush()
+    return out
@@ -1,28 +1,360 @@
 import os
-import cv2
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from flask import Blueprint, request, jsonify, send_from_directory, current_app
+from flask import Blueprint, Response, request, jsonify, send_from_directory, current_app
 from PIL import Image
 import base64
+import functools
+import hashlib
+import tempfile
 from io import BytesIO
 from .image_processing import ImageProcessor
-from .image_processing.operations_config import OPERATIONS_CONFIG, CATEGORY_METADATA
+from .image_processing.admission import CostBudget
+from .image_processing.cache import LRUCache
+from .image_processing.cancellation import Cancelled, CancellationToken, LatestWins
+from .image_processing.codec import OutputFormat, decode_reduced, encode_image, make_thumbnail, probe_dimensions
+from .image_processing.disk_cache import DiskCache
+from .image_processing.jobs import JobManager
+from .image_processing.process_pool import ProcessPool
+from .image_processing.scheduler import Scheduler
+from .image_processing.operations_config import CATEGORY_METADATA
 import json
 import logging
+import queue
+import threading
 import time
+import uuid
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 bp = Blueprint('main', __name__)
-processor = ImageProcessor()
+
+# Worker processes for GIL-bound pipelines (0 runs everything in threads)
+PROCESS_WORKERS = int(os.environ.get('IMAGE_PROCESS_WORKERS', 0))
+
+processor = ImageProcessor(pool=ProcessPool(PROCESS_WORKERS) if PROCESS_WORKERS else None)
+jobs = JobManager(processor)
+
+@functools.lru_cache(maxsize=None)
+def operation_catalog():
+    """Serialize the operation catalog and compute its ETag.
+    
+    The catalog never changes while the server runs, so it is built on the
+    first request (loading every operation) and revalidated by clients
+    through its ETag.
+    
+    Returns:
+        Tuple[bytes, str]: The JSON body and its ETag.
+    """
+    body = json.dumps({
+        'operations': processor.operation_catalog(),
+        'categories': CATEGORY_METADATA
+    }).encode('utf-8')
+    return body, hashlib.sha1(body).hexdigest()
+
+# Pipelines estimated to take longer than 5 s are run on a downscaled proxy,
+# and those over 5 minutes are refused
+budget = CostBudget(interactive_ms=5000, max_ms=300000, over_budget=CostBudget.DOWNSCALE)
+
+# Only the newest /api/process request of each client is worth finishing
+latest = LatestWins()
+
+# Upper bound for long-polling a job, in seconds
+MAX_JOB_WAIT = 60
+
+# Default long edge of the proxy processed in preview mode, in pixels
+DEFAULT_PREVIEW_EDGE = 1024
+
+# Default long edge of intermediate step previews, in pixels (0 keeps the
+# full resolution)
+DEFAULT_STEP_PREVIEW_EDGE = 512
+
+# Step previews are encoded here while later steps are still computing
+encoder_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='encode')
+
+# How processed images are returned: base64 data URLs inside JSON, raw bytes
+# in a multipart/mixed body, or URLs to fetch each image from separately
+TRANSPORTS = ('json', 'multipart', 'ref')
+
+# Encoded images kept for the 'ref' transport, as (data, mimetype)
+RESULT_TTL = 300
+results = LRUCache(256 * 1024 * 1024, sizeof=lambda entry: len(entry[0]), ttl=RESULT_TTL)
+
+# Decoded uploads referenced by image handles, keyed by upload digest
+IMAGE_TTL = 1800
+images = LRUCache(1024 * 1024 * 1024, ttl=IMAGE_TTL)
+
+# Encoded final results kept on disk across restarts, keyed by content
+DISK_CACHE_DIR = os.environ.get('IMAGE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'imageprocessor-cache'))
+DISK_CACHE_BYTES = 2 * 1024 * 1024 * 1024
+disk_cache = DiskCache(DISK_CACHE_DIR, DISK_CACHE_BYTES)
+
+class RequestError(Exception):
+    """Invalid client input, reported as a JSON error response."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+    def response(self):
+        return jsonify({'success': False, 'error': self.message}), self.status
+
+def read_upload() -> bytes:
+    """Read the bytes of the uploaded 'image' file.
+    
+    Raises:
+        RequestError: If no image was uploaded.
+    """
+    if 'image' not in request.files:
+        raise RequestError('No image provided')
+    
+    file = request.files['image']
+    if file.filename == '':
+        raise RequestError('No image selected')
+    return file.read()
+
+def read_uploaded_image():
+    """Read and decode the uploaded 'image' file.
+    
+    Returns:
+        Tuple[np.ndarray, bytes]: The decoded image and the raw upload.
+    
+    Raises:
+        RequestError: If no valid image was uploaded.
+    """
+    image_data = read_upload()
+    image, _ = decode_upload(image_data)
+    return image, image_data
+
+def decode_upload(image_data: bytes, max_edge: int = 0):
+    """Decode uploaded image bytes, at reduced resolution if ``max_edge`` allows.
+    
+    Returns:
+        Tuple[np.ndarray, float]: The image and its size relative to the
+            upload's, below 1 after a reduced decode.
+    
+    Raises:
+        RequestError: If the bytes are not a valid image.
+    """
+    try:
+        image, scale = decode_reduced(image_data, max_edge)
+    except Exception as e:
+        logger.error(f"Image decoding error: {str(e)}")
+        raise RequestError('Failed to decode image')
+    
+    if image is None:
+        raise RequestError('Invalid image format')
+    return image, scale
+
+def lookup_image(handle: str) -> np.ndarray:
+    """Return the image stored under a handle and renew its expiry.
+    
+    Raises:
+        RequestError: If the handle is unknown or expired.
+    """
+    image = images.get(handle)
+    if image is None:
+        raise RequestError('Unknown or expired image handle', 404)
+    images.put(handle, image)
+    return image
+
+def read_image_source():
+    """Return the request's 'image_handle', or else its uploaded 'image' file.
+    
+    Nothing is decoded yet: cached results are looked up by the source's
+    digest and the budget is applied to its probed shape first, see
+    :func:`load_image`.
+    
+    Returns:
+        Tuple[Optional[str], Optional[bytes]]: The handle, or the upload.
+    
+    Raises:
+        RequestError: If no image was sent.
+    """
+    handle = request.form.get('image_handle')
+    if handle:
+        return handle, None
+    return None, read_upload()
+
+def source_digest(handle, image_data) -> str:
+    """Return the content address of an image source.
+    
+    Handles are themselves the digests of their uploads.
+    """
+    return handle or hashlib.sha1(image_data).hexdigest()
+
+def source_shape(handle, image_data):
+    """Return the (height, width) of an image source without decoding it.
+    
+    Returns None when the handle has expired or the header cannot be read;
+    :func:`load_image` reports those cases.
+    """
+    if handle:
+        image = images.get(handle)
+        return image.shape[:2] if image is not None else None
+    return probe_dimensions(BytesIO(image_data))
+
+def load_image(handle, image_data, max_edge: int = 0):
+    """Resolve an image source to the image.
+    
+    Using a handle renews its expiry, so images stay available while they
+    are being edited. Handles are already decoded at full resolution.
+    
+    Args:
+        max_edge (int): Long edge the image is needed at, which lets JPEG
+            uploads decode at reduced resolution; 0 decodes full resolution.
+    
+    Returns:
+        Tuple[np.ndarray, float]: The image and its size relative to the
+            original.
+    
+    Raises:
+        RequestError: If the handle is unknown or expired, or the upload is
+            not a valid image.
+    """
+    if handle:
+        return lookup_image(handle), 1.0
+    return decode_upload(image_data, max_edge)
+
+def admit(pipeline, shape, preview: bool = False, max_edge: int = DEFAULT_PREVIEW_EDGE,
+          interactive: bool = True):
+    """Estimate a pipeline's cost on an image and apply the server's budget.
+    
+    Args:
+        pipeline (List[Dict[str, Any]]): List of operations to apply.
+        shape (Optional[Tuple[int, ...]]): Shape of the input image.
+        preview (bool): Whether the pipeline runs on a proxy.
+        max_edge (int): Long edge of the proxy in preview mode.
+        interactive (bool): Whether the caller waits for the result. Jobs
+            are only held to the hard limit.
+    
+    Returns:
+        Tuple[Optional[str], Optional[float], int]: The budget's action, the
+            estimate in milliseconds and the long edge to downscale to if
+            the action asks for it, or (None, None, max_edge) without a shape.
+    
+    Raises:
+        RequestError: If the pipeline is more expensive than the server
+            accepts.
+    """
+    if shape is None:
+        return None, None, max_edge
+    
+    height, width = shape[:2]
+    if preview and max(height, width) > max_edge:
+        factor = max_edge / max(height, width)
+        height, width = round(height * factor), round(width * factor)
+    
+    cost = processor.estimate_cost(pipeline, (height, width))
+    action = budget.decide(cost)
+    if action == CostBudget.REJECT and (interactive or cost > budget.max_ms):
+        raise RequestError(f'Pipeline is too expensive for this image (estimated {round(cost)} ms)', 422)
+    return action, cost, budget.fitting_edge((height, width), cost)
+
+def read_json_field(name: str, default: str = '[]', form=None):
+    """Parse a JSON-encoded form field.
+    
+    Args:
+        name (str): Name of the field.
+        default (str): JSON used when the field is missing.
+        form (Optional[Mapping[str, str]]): Fields to read, defaults to
+            the current request's form.
+    
+    Raises:
+        RequestError: If the field is not valid JSON.
+    """
+    form = request.form if form is None else form
+    try:
+        return json.loads(form.get(name, default))
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON parsing error: {str(e)}")
+        raise RequestError('Invalid pipeline data format')
 
 def encode_image_to_base64(image: np.ndarray) -> str:
     """Convert an OpenCV image to base64 string."""
-    _, buffer = cv2.imencode('.png', image)
-    img_str = base64.b64encode(buffer).decode('utf-8')
-    return f'data:image/png;base64,{img_str}'
+    return encode_bytes_to_base64(encode_image(image, '.png'))
+
+def encode_bytes_to_base64(data: bytes, mimetype: str = 'image/png') -> str:
+    """Convert encoded image bytes to a base64 data URL."""
+    img_str = base64.b64encode(data).decode('utf-8')
+    return f'data:{mimetype};base64,{img_str}'
+
+def store_result(data: bytes, mimetype: str) -> str:
+    """Keep an encoded image for later download and return its URL."""
+    result_id = uuid.uuid4().hex
+    results.put(result_id, (data, mimetype))
+    return f'/api/results/{result_id}'
+
+def encode_timed(image: np.ndarray, output_format: OutputFormat, max_edge: int = 0):
+    """Optionally downscale and encode an image, measuring the time taken.
+    
+    Returns:
+        Tuple[bytes, float]: The encoded image and the time in milliseconds.
+    """
+    start_time = time.perf_counter()
+    data = output_format.encode(make_thumbnail(image, max_edge))
+    return data, (time.perf_counter() - start_time) * 1000
+
+def encode_payload(metadata: dict, image: bytes, steps: dict, output_format: OutputFormat,
+                   transport: str, step_format: OutputFormat = None):
+    """Serialize an encoded result and its intermediate steps for a transport.
+    
+    Args:
+        metadata (dict): JSON-serializable fields such as timings.
+        image (bytes): The encoded final image.
+        steps (dict): Encoded intermediate images by pipeline index.
+        output_format (OutputFormat): Format the final image is encoded in.
+        transport (str): One of :data:`TRANSPORTS`.
+        step_format (OutputFormat): Format of the intermediate images,
+            defaults to ``output_format``.
+    
+    Returns:
+        Tuple[bytes, str]: The response body and its content type.
+    """
+    mimetype = output_format.mimetype
+    step_mimetype = (step_format or output_format).mimetype
+    
+    if transport == 'json':
+        return json.dumps({
+            **metadata,
+            'image': encode_bytes_to_base64(image, mimetype),
+            'intermediate_results': {str(i): encode_bytes_to_base64(data, step_mimetype) for i, data in steps.items()}
+        }).encode('utf-8'), 'application/json'
+    
+    if transport == 'ref':
+        return json.dumps({
+            **metadata,
+            'image': store_result(image, mimetype),
+            'intermediate_results': {str(i): store_result(data, step_mimetype) for i, data in steps.items()}
+        }).encode('utf-8'), 'application/json'
+    
+    # multipart: a small JSON part, then one binary part per image
+    boundary = uuid.uuid4().hex
+    parts = [('metadata', 'application/json', json.dumps({
+        **metadata,
+        'intermediate_results': sorted(steps)
+    }).encode('utf-8')), ('image', mimetype, image)]
+    parts += [(f'step-{i}', step_mimetype, data) for i, data in sorted(steps.items())]
+    
+    body = b''.join(
+        f'--{boundary}\r\nContent-Type: {content_type}\r\n'
+        f'Content-Disposition: inline; name="{name}"\r\n\r\n'.encode('utf-8') + data + b'\r\n'
+        for name, content_type, data in parts
+    ) + f'--{boundary}--\r\n'.encode('utf-8')
+    
+    return body, f'multipart/mixed; boundary={boundary}'
+
+def send_encoded(metadata: dict, image: bytes, steps: dict, output_format: OutputFormat,
+                 transport: str, step_format: OutputFormat = None) -> Response:
+    """Build the response for an encoded result and its intermediate steps.
+    
+    See :func:`encode_payload` for the arguments.
+    """
+    body, content_type = encode_payload(metadata, image, steps, output_format, transport, step_format)
+    return Response(body, content_type=content_type)
 
 @bp.route('/')
 def index():
@@ -32,103 +364,562 @@ def index():
 @bp.route('/api/operations', methods=['GET'])
 def get_operations():
     """Return the list of available image processing operations."""
-    logger.info('Fetching operations...')
-    logger.info(f'Operations: {len(OPERATIONS_CONFIG)} available')
-    logger.info(f'Categories: {list(CATEGORY_METADATA.keys())}')
+    body, etag = operation_catalog()
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def read_output_format(prefix: str = '', default: OutputFormat = None, form=None) -> OutputFormat:
+    """Parse the 'format', 'quality' and 'compression' form fields.
     
-    response = {
-        'operations': OPERATIONS_CONFIG,
-        'categories': CATEGORY_METADATA
+    Args:
+        prefix (str): Prefix of the field names, e.g. 'preview_'.
+        default (OutputFormat): Returned when no format field was sent.
+        form (Optional[Mapping[str, str]]): Fields to read, defaults to
+            the current request's form.
+    
+    Raises:
+        RequestError: If the encoding settings are invalid.
+    """
+    form = request.form if form is None else form
+    if default is not None and not form.get(prefix + 'format'):
+        return default
+    try:
+        quality = form.get(prefix + 'quality')
+        compression = form.get(prefix + 'compression')
+        return OutputFormat(
+            form.get(prefix + 'format', 'png'),
+            quality=int(quality) if quality else None,
+            compression=int(compression) if compression else None
+        )
+    except ValueError as e:
+        raise RequestError(f'Invalid output format: {str(e)}')
+
+def read_flag(name: str, form=None) -> bool:
+    """Parse a boolean form field ('true'/'1' enable it)."""
+    form = request.form if form is None else form
+    return form.get(name, 'false').lower() in ('true', '1')
+
+def read_int_field(name: str, default: int, minimum: int = 1, form=None) -> int:
+    """Parse an integer form field.
+    
+    Raises:
+        RequestError: If the field is not an integer of at least ``minimum``.
+    """
+    form = request.form if form is None else form
+    try:
+        value = int(form.get(name, default))
+    except ValueError:
+        raise RequestError(f'Invalid value for {name}')
+    if value < minimum:
+        raise RequestError(f'Invalid value for {name}')
+    return value
+
+class ProcessOptions:
+    """Settings of an /api/process request, parsed from its form fields.
+    
+    Args:
+        form (Mapping[str, str]): The request's form fields.
+    
+    Raises:
+        RequestError: If a field is invalid.
+    """
+    
+    def __init__(self, form):
+        self.pipeline = read_json_field('pipeline', form=form)
+        self.preview_steps = read_json_field('preview_steps', form=form)
+        self.preview = read_flag('preview', form)
+        self.max_edge = read_int_field('max_edge', DEFAULT_PREVIEW_EDGE, form=form)
+        self.refine = read_flag('refine', form)
+        self.output_format = read_output_format(form=form)
+        self.step_format = read_output_format('preview_', default=self.output_format, form=form)
+        self.preview_size = read_int_field('preview_size', DEFAULT_STEP_PREVIEW_EDGE, minimum=0, form=form)
+        self.transport = form.get('transport', 'json')
+        if self.transport not in TRANSPORTS:
+            raise RequestError(f'Unsupported transport: {self.transport}')
+        self.stream_id = form.get('stream_id') or None
+        self.client_id = form.get('client_id') or None
+        # Size of the decoded image relative to the upload, see decode_edge
+        self.image_scale = 1.0
+    
+    def admit(self, shape):
+        """Apply :func:`admit` to this request's pipeline on an image of ``shape``."""
+        return admit(self.pipeline, shape, self.preview, self.max_edge)
+    
+    def decode_edge(self, action, fitting_edge: int) -> int:
+        """Long edge the upload needs decoding at, or 0 for full resolution.
+        
+        Previews and downscaled runs only need the proxy's pixels. Queued
+        jobs and refinements run at full resolution.
+        """
+        if self.refine or action == CostBudget.ASYNC:
+            return 0
+        if action == CostBudget.DOWNSCALE:
+            return fitting_edge
+        return self.max_edge if self.preview else 0
+    
+    def admit_image(self, handle, image_data):
+        """Admit the request, then load its image at the size it needs.
+        
+        Expensive pipelines are turned away before the image is decoded.
+        Uploads whose shape cannot be probed are decoded at full resolution
+        and admitted on the decoded shape. Blocks while decoding.
+        
+        Args:
+            handle (Optional[str]): Image handle, see :func:`read_image_source`.
+            image_data (Optional[bytes]): Uploaded image, without a handle.
+        
+        Returns:
+            Tuple[np.ndarray, Optional[str], float, int]: The image, and the
+                budget's action, estimate and fitting edge.
+        
+        Raises:
+            RequestError: If the image cannot be loaded or the pipeline is
+                more expensive than the server accepts.
+        """
+        shape = source_shape(handle, image_data)
+        action, estimated_cost, fitting_edge = self.admit(shape)
+        max_edge = self.decode_edge(action, fitting_edge) if shape is not None else 0
+        image, self.image_scale = load_image(handle, image_data, max_edge)
+        if estimated_cost is None:
+            action, estimated_cost, fitting_edge = self.admit(image.shape)
+        return image, action, estimated_cost, fitting_edge
+    
+    def result_key(self, image_digest: str):
+        """Content address of the result, or None if it should not be cached.
+        
+        Only full-resolution results without intermediate steps are cached.
+        """
+        if self.preview or self.preview_steps:
+            return None
+        return processor.result_key(image_digest, self.pipeline, self.output_format.signature)
+    
+    def downscale(self, max_edge: int) -> None:
+        """Run the pipeline as a preview with the given long edge instead."""
+        self.preview, self.max_edge = True, max_edge
+
+# Metadata of a result served from the disk cache
+CACHED_METADATA = {
+    'success': True,
+    'processing_time': 0,
+    'compute_time': 0,
+    'encode_time': 0,
+    'cached': True
+}
+
+# Body of the 409 answered to requests superseded by a newer one
+CANCELLED_ERROR = {
+    'success': False,
+    'cancelled': True,
+    'error': 'Superseded by a newer request'
+}
+
+def queue_refinement(image: np.ndarray, options: ProcessOptions, image_digest: str):
+    """Queue the full-resolution pipeline of an /api/process request as a job."""
+    return jobs.submit(image, options.pipeline, image_digest, stream_id=options.stream_id,
+                       priority=Scheduler.FINAL)
+
+def execute(options: ProcessOptions, image: np.ndarray, image_digest: str, on_step=None, cancel=None):
+    """Run an /api/process request's pipeline, as a preview if it asks for one.
+    
+    Consecutive per-pixel adjustments are fused into a single pass; steps
+    with previews enabled keep their own output. Keying on the image digest
+    lets slider edits resume after the unchanged steps. Frames tagged with a
+    stream ID get their own state for background subtraction and optical
+    flow.
+    
+    Returns:
+        Tuple[PipelineResult, Optional[Job]]: The result, and the
+            full-resolution job queued for ``refine``.
+    """
+    if options.preview:
+        result = processor.run_preview(image, options.pipeline, options.max_edge, options.preview_steps,
+                                       image_digest, on_step=on_step, cancel=cancel,
+                                       priority=Scheduler.PREVIEW, image_scale=options.image_scale,
+                                       stream_id=options.stream_id)
+        job = queue_refinement(image, options, image_digest) if options.refine else None
+        return result, job
+    
+    result = processor.run_pipeline(
+        image, options.pipeline, options.preview_steps, image_digest,
+        on_step=on_step, stream_id=options.stream_id, cancel=cancel,
+        priority=Scheduler.FINAL
+    )
+    return result, None
+
+def result_metadata(options: ProcessOptions, result, job, compute_time: float,
+                    encode_time: float, estimated_cost: float) -> dict:
+    """Describe a computed /api/process result."""
+    metadata = {
+        'success': True,
+        'processing_time': round(result.processing_time),  # Round to nearest millisecond
+        'compute_time': round(compute_time),
+        'encode_time': round(encode_time),
+        'cached': False,
+        'shared': result.shared,
+        'estimated_cost': round(estimated_cost)
+    }
+    if options.preview:
+        metadata['preview'] = {'scale': result.scale}
+        if job is not None:
+            metadata['preview']['job_id'] = job.id
+    return metadata
+
+def render(options: ProcessOptions, image: np.ndarray, image_digest: str,
+           estimated_cost: float, cancel=None):
+    """Run an /api/process request's pipeline and encode its images.
+    
+    Step previews are encoded on :data:`encoder_pool` while later steps are
+    still computing.
+    
+    Blocks until done, so asynchronous servers call it from an executor.
+    
+    Returns:
+        Tuple[dict, bytes, Dict[int, bytes]]: The response metadata, the
+            encoded final image and the encoded intermediate steps.
+    
+    Raises:
+        Cancelled: If ``cancel`` is cancelled before the pipeline finishes.
+    """
+    preview_steps = set(options.preview_steps)
+    pending = {}
+    
+    def encode_step(index, step_result):
+        if index in preview_steps and index not in pending:
+            pending[index] = encoder_pool.submit(encode_timed, step_result, options.step_format,
+                                                 options.preview_size)
+    
+    start_time = time.perf_counter()
+    # Without previews to encode, identical requests can share one run
+    result, job = execute(options, image, image_digest, encode_step if preview_steps else None, cancel)
+    compute_time = (time.perf_counter() - start_time) * 1000
+    
+    # Previews restored from the cache never reached the callback
+    for i, step_result in result.intermediate_results.items():
+        encode_step(i, step_result)
+    
+    # Encode final result
+    final_image, encode_time = encode_timed(result.image, options.output_format)
+    
+    intermediate_results = {}
+    for i, future in pending.items():
+        intermediate_results[i], step_encode_time = future.result()
+        encode_time += step_encode_time
+    
+    metadata = result_metadata(options, result, job, compute_time, encode_time, estimated_cost)
+    return metadata, final_image, intermediate_results
+
+def server_sent_event(event: str, data: dict) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+def stream_events(options: ProcessOptions, image: np.ndarray, image_digest: str,
+                  estimated_cost: float, result_key=None, cached=None, cancel=None):
+    """Run an /api/process request's pipeline, yielding server-sent events.
+    
+    A 'step' event carries each step listed in ``preview_steps`` as soon as
+    it completes, with the milliseconds since the previous step finished.
+    A 'result' event with the final image and the usual metadata ends the
+    stream, or an 'error' event if the run failed or was superseded. Each
+    image is encoded right before it is sent, so only one encoded image is
+    held at a time.
+    
+    The pipeline runs on its own thread. Closing the generator, which
+    happens when the client disconnects, cancels it.
+    
+    Args:
+        result_key (Optional[str]): Disk cache key under which the final
+            image is stored.
+        cached (Optional[bytes]): The final image found in the disk cache,
+            sent without running the pipeline.
+        cancel (Optional[CancellationToken]): Token of the run, for callers
+            that notice a disconnect while the generator is busy; taken
+            from :data:`latest` if omitted.
+    """
+    transport = options.transport
+    
+    def image_field(data: bytes, output_format: OutputFormat) -> str:
+        if transport == 'ref':
+            return store_result(data, output_format.mimetype)
+        return encode_bytes_to_base64(data, output_format.mimetype)
+    
+    if cached is not None:
+        yield server_sent_event('result', {**CACHED_METADATA, 'image': image_field(cached, options.output_format)})
+        return
+    
+    preview_steps = set(options.preview_steps)
+    completed = queue.Queue()
+    outcome = {}
+    last_step = time.perf_counter()
+    
+    def on_step(index, step_result):
+        nonlocal last_step
+        now = time.perf_counter()
+        if index in preview_steps:
+            completed.put((index, step_result, (now - last_step) * 1000))
+        last_step = now
+    
+    token = cancel or latest.begin(options.client_id) or CancellationToken()
+    
+    def run():
+        try:
+            outcome['result'] = execute(options, image, image_digest, on_step if preview_steps else None, token)
+        except Exception as e:
+            outcome['error'] = e
+        finally:
+            completed.put(None)
+    
+    start_time = time.perf_counter()
+    threading.Thread(target=run, name='stream', daemon=True).start()
+    
+    try:
+        sent = set()
+        encode_time = 0.0
+        
+        def step_event(index, step_result, elapsed):
+            nonlocal encode_time
+            data, step_encode_time = encode_timed(step_result, options.step_format, options.preview_size)
+            encode_time += step_encode_time
+            sent.add(index)
+            return server_sent_event('step', {
+                'index': index,
+                'elapsed': round(elapsed, 2) if elapsed is not None else None,
+                'image': image_field(data, options.step_format)
+            })
+        
+        for index, step_result, elapsed in iter(completed.get, None):
+            if index not in sent:
+                yield step_event(index, step_result, elapsed)
+        compute_time = (time.perf_counter() - start_time) * 1000
+        
+        error = outcome.get('error')
+        if isinstance(error, Cancelled):
+            yield server_sent_event('error', CANCELLED_ERROR)
+            return
+        if error is not None:
+            logger.error(f"Error during image processing: {str(error)}")
+            yield server_sent_event('error', {'success': False, 'error': 'An error occurred during image processing'})
+            return
+        
+        # Previews restored from the cache, or computed for an identical
+        # request, never reached the callback
+        result, job = outcome['result']
+        for index, step_result in sorted(result.intermediate_results.items()):
+            if index not in sent:
+                yield step_event(index, step_result, result.step_times.get(index))
+        
+        final_image, final_encode_time = encode_timed(result.image, options.output_format)
+        if result_key is not None:
+            disk_cache.put(result_key, final_image)
+        metadata = result_metadata(options, result, job, compute_time, encode_time + final_encode_time,
+                                   estimated_cost)
+        yield server_sent_event('result', {**metadata, 'image': image_field(final_image, options.output_format)})
+    finally:
+        # Stops the run if the client went away before it finished
+        token.cancel()
+        latest.end(options.client_id, token)
+
+class ProcessPlan:
+    """How to answer an /api/process request, decided by :func:`plan_process`.
+    
+    Shared by the Flask views and the asyncio frontend, which only turn a
+    plan into their own response types.
+    
+    Attributes:
+        action (str): :data:`NOT_MODIFIED` when the client's copy is
+            current, :data:`CACHED` when ``cached`` holds the encoded
+            result, :data:`QUEUED` when ``job`` runs the pipeline in the
+            background, or :data:`RUN` to compute it now.
+        etag (Optional[str]): Weak ETag of the result, if it has one.
+    """
+    
+    NOT_MODIFIED = 'not_modified'
+    CACHED = 'cached'
+    QUEUED = 'queued'
+    RUN = 'run'
+    
+    def __init__(self, action: str, options: ProcessOptions, image_digest: str,
+                 result_key=None, etag=None, cached=None, image=None, estimated_cost=None, job=None):
+        self.action = action
+        self.options = options
+        self.image_digest = image_digest
+        self.result_key = result_key
+        self.etag = etag
+        self.cached = cached
+        self.image = image
+        self.estimated_cost = estimated_cost
+        self.job = job
+    
+    def queued_body(self) -> dict:
+        """Body of the 202 answered for a :data:`QUEUED` plan."""
+        return {'success': True, 'estimated_cost': round(self.estimated_cost), **self.job.to_dict()}
+    
+    def render(self, cancel=None):
+        """Compute a :data:`RUN` plan with :func:`render` and store its result.
+        
+        Blocks until done.
+        """
+        metadata, final_image, intermediate_results = render(self.options, self.image, self.image_digest,
+                                                             self.estimated_cost, cancel)
+        if self.result_key is not None:
+            disk_cache.put(self.result_key, final_image)
+        return metadata, final_image, intermediate_results
+    
+    def events(self, cancel=None):
+        """Return the :func:`stream_events` of a :data:`CACHED` or :data:`RUN` plan."""
+        if self.action == self.CACHED:
+            return stream_events(self.options, None, self.image_digest, None, cached=self.cached)
+        return stream_events(self.options, self.image, self.image_digest, self.estimated_cost, self.result_key,
+                             cancel=cancel)
+
+def plan_process(options: ProcessOptions, handle, image_data, image_digest: str,
+                 etag_matches=None) -> ProcessPlan:
+    """Decide how to answer an /api/process request, loading its image if needed.
+    
+    Stored results are served whatever the budget says about computing
+    them. Otherwise the request is admitted: over-budget pipelines are
+    queued as a job or downscaled, which also leaves them uncached. Blocks
+    while reading the disk cache and decoding.
+    
+    Args:
+        options (ProcessOptions): The request's settings.
+        handle (Optional[str]): Image handle, see :func:`read_image_source`.
+        image_data (Optional[bytes]): Uploaded image, without a handle.
+        image_digest (str): See :func:`source_digest`.
+        etag_matches (Optional[Callable[[str], bool]]): Whether the client
+            already holds the result with a given weak ETag.
+    
+    Raises:
+        RequestError: If the image cannot be loaded or the pipeline is
+            more expensive than the server accepts.
+    """
+    result_key = options.result_key(image_digest)
+    etag = None
+    
+    if result_key is not None:
+        # The ref transport's URLs expire, so only the others are tagged
+        if options.transport != 'ref':
+            etag = f'{result_key}-{options.transport}'
+        if etag is not None and etag_matches is not None and etag_matches(etag):
+            return ProcessPlan(ProcessPlan.NOT_MODIFIED, options, image_digest, etag=etag)
+        
+        cached = disk_cache.get(result_key)
+        if cached is not None:
+            return ProcessPlan(ProcessPlan.CACHED, options, image_digest, result_key, etag, cached=cached)
+    
+    image, action, estimated_cost, fitting_edge = options.admit_image(handle, image_data)
+    if action == CostBudget.ASYNC:
+        job = queue_refinement(image, options, image_digest)
+        return ProcessPlan(ProcessPlan.QUEUED, options, image_digest, estimated_cost=estimated_cost, job=job)
+    if action == CostBudget.DOWNSCALE:
+        options.downscale(fitting_edge)
+        result_key = etag = None
+    return ProcessPlan(ProcessPlan.RUN, options, image_digest, result_key, etag,
+                       image=image, estimated_cost=estimated_cost)
+
+def register_image(image: np.ndarray, image_data: bytes) -> dict:
+    """Store a decoded upload under a handle and describe it."""
+    handle = hashlib.sha1(image_data).hexdigest()
+    image.flags.writeable = False
+    images.put(handle, image)
+    
+    height, width = image.shape[:2]
+    return {
+        'success': True,
+        'image_handle': handle,
+        'width': width,
+        'height': height,
+        'expires_in': IMAGE_TTL
     }
+
+@bp.route('/api/images', methods=['POST'])
+def upload_image():
+    """Decode an uploaded image once and return a handle for later requests.
     
-    logger.info('Sending operations response')
-    return jsonify(response)
+    The handle can be sent as 'image_handle' instead of an 'image' file to
+    /api/process and /api/jobs. Handles expire ``IMAGE_TTL`` seconds after
+    their last use, or earlier when the store runs out of space.
+    """
+    try:
+        image, image_data = read_uploaded_image()
+    except RequestError as e:
+        return e.response()
+    
+    return jsonify(register_image(image, image_data)), 201
 
 @bp.route('/api/process', methods=['POST'])
 def process_image():
-    """Process an image with the specified pipeline of operations."""
+    """Process an image with the specified pipeline of operations.
+    
+    With ``preview`` set, the pipeline runs on a proxy whose long edge is at
+    most ``max_edge`` pixels. Adding ``refine`` also queues the
+    full-resolution pipeline as a job whose ID is returned for polling.
+    
+    Images are encoded as ``format`` (png, jpeg or webp, tuned by
+    ``quality`` or ``compression``) and returned through ``transport``.
+    Intermediate steps listed in ``preview_steps`` are downscaled to
+    ``preview_size`` and encoded as ``preview_format`` (with
+    ``preview_quality``/``preview_compression``) on a thread pool while the
+    rest of the pipeline runs.
+    
+    Requests carrying a ``client_id`` cancel that client's previous request
+    if it is still running, which then answers 409.
+    
+    Pipelines whose estimated cost exceeds the interactive budget are
+    downscaled, queued as a job or rejected, as configured by ``budget``.
+    
+    Full-resolution results without intermediate steps are content
+    addressed: they are served from the disk cache when possible and carry
+    an ETag, so clients sending it back in If-None-Match get a 304.
+    """
     try:
-        # Validate input
-        if 'image' not in request.files:
-            return jsonify({'success': False, 'error': 'No image provided'}), 400
-        
-        file = request.files['image']
-        if file.filename == '':
-            return jsonify({'success': False, 'error': 'No image selected'}), 400
-        
-        # Parse request data
+        # Validate input and parse request data
         try:
-            pipeline_data = json.loads(request.form.get('pipeline', '[]'))
-            preview_steps = json.loads(request.form.get('preview_steps', '[]'))
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parsing error: {str(e)}")
-            return jsonify({'success': False, 'error': 'Invalid pipeline data format'}), 400
+            options = ProcessOptions(request.form)
+            handle, image_data = read_image_source()
+        except RequestError as e:
+            return e.response()
         
-        # Read and decode image
         try:
-            image_data = file.read()
-            nparr = np.frombuffer(image_data, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if image is None:
-                return jsonify({'success': False, 'error': 'Invalid image format'}), 400
-        except Exception as e:
-            logger.error(f"Image decoding error: {str(e)}")
-            return jsonify({'success': False, 'error': 'Failed to decode image'}), 400
+            plan = plan_process(options, handle, image_data, source_digest(handle, image_data),
+                                request.if_none_match.contains_weak)
+        except RequestError as e:
+            return e.response()
         
-        # Process image and collect intermediate results
-        result = image.copy()
-        intermediate_results = {}
+        if plan.action == ProcessPlan.QUEUED:
+            return jsonify(plan.queued_body()), 202
+        if plan.action != ProcessPlan.RUN:
+            if plan.action == ProcessPlan.NOT_MODIFIED:
+                response = Response(status=304)
+            else:
+                response = send_encoded(CACHED_METADATA, plan.cached, {}, options.output_format,
+                                        options.transport)
+            if plan.etag is not None:
+                response.set_etag(plan.etag, weak=True)
+            return response
         
+        # Process image and collect intermediate results
+        token = latest.begin(options.client_id)
         try:
-            # Initialize total processing time
-            total_processing_time = 0
-            
-            for i, step in enumerate(pipeline_data):
-                # Validate operation
-                operation_id = step['id']
-                if operation_id not in processor._operations:
-                    logger.warning(f"Skipping unknown operation: {operation_id}")
-                    continue
-                
-                # Get operation parameters
-                params = step.get('params', {})
-                
-                # Get or create operation instance
-                if operation_id not in processor._instances:
-                    processor._instances[operation_id] = processor._operations[operation_id]()
-                
-                # Apply operation and measure time
-                operation = processor._instances[operation_id]
-                operation.set_params(params)
-                
-                start_time = time.perf_counter()
-                result = operation.process(result)
-                end_time = time.perf_counter()
-                
-                # Add to total processing time
-                total_processing_time += (end_time - start_time) * 1000  # Convert to milliseconds
-                
-                # Save intermediate result if requested
-                if i in preview_steps:
-                    intermediate_results[str(i)] = encode_image_to_base64(result)
-            
-            # Encode final result
-            final_image = encode_image_to_base64(result)
-            
-            return jsonify({
-                'success': True,
-                'image': final_image,
-                'intermediate_results': intermediate_results,
-                'processing_time': round(total_processing_time)  # Round to nearest millisecond
-            })
+            metadata, final_image, intermediate_results = plan.render(token)
+            response = send_encoded(metadata, final_image, intermediate_results, options.output_format,
+                                    options.transport, options.step_format)
+            if plan.etag is not None:
+                response.set_etag(plan.etag, weak=True)
+            return response
             
+        except Cancelled:
+            return jsonify(CANCELLED_ERROR), 409
         except Exception as e:
             logger.error(f"Error during image processing: {str(e)}")
             return jsonify({
                 'success': False, 
                 'error': 'An error occurred during image processing'
             }), 500
+        finally:
+            latest.end(options.client_id, token)
             
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
@@ -137,6 +928,254 @@ def process_image():
             'error': 'An unexpected error occurred'
         }), 500
 
+@bp.route('/api/process/stream', methods=['POST'])
+def process_image_stream():
+    """Process an image like /api/process, streaming results as they complete.
+    
+    Takes the same fields. The response is a ``text/event-stream`` of
+    :func:`stream_events`, with images as base64 data URLs or, with the
+    ``ref`` transport, as result URLs. Requests the budget sends to a job
+    are answered 202 with the job, and invalid ones with a JSON error.
+    """
+    try:
+        options = ProcessOptions(request.form)
+        if options.transport == 'multipart':
+            raise RequestError('Streaming supports the json and ref transports')
+        
+        handle, image_data = read_image_source()
+        plan = plan_process(options, handle, image_data, source_digest(handle, image_data))
+    except RequestError as e:
+        return e.response()
+    
+    if plan.action == ProcessPlan.QUEUED:
+        return jsonify(plan.queued_body()), 202
+    return Response(plan.events(),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Answer for result and job IDs that are not (or no longer) known
+UNKNOWN_RESULT = {'success': False, 'error': 'Unknown or expired result'}
+UNKNOWN_JOB = {'success': False, 'error': 'Unknown or expired job'}
+
+# Headers of a stored 'ref' result
+RESULT_HEADERS = {'Cache-Control': f'private, max-age={RESULT_TTL}'}
+
+@bp.route('/api/results/<result_id>', methods=['GET'])
+def get_result(result_id):
+    """Return an encoded image stored for the 'ref' transport."""
+    entry = results.get(result_id)
+    if entry is None:
+        return jsonify(UNKNOWN_RESULT), 404
+    
+    data, mimetype = entry
+    return Response(data, mimetype=mimetype, headers=RESULT_HEADERS)
+
+def read_batch_options(form=None):
+    """Parse the form fields of an /api/process_batch request.
+    
+    Returns:
+        Tuple[list, str, str, Optional[int], int]: The pipeline, the
+            executor kind, the result order, the worker count and the long
+            edge of thumbnails (0 for full resolution).
+    
+    Raises:
+        RequestError: If a field is invalid.
+    """
+    form = request.form if form is None else form
+    pipeline_data = read_json_field('pipeline', form=form)
+    
+    executor = form.get('executor', 'thread')
+    order = form.get('order', 'input')
+    try:
+        workers = int(form.get('workers', 0)) or None
+    except ValueError:
+        workers = -1
+    if executor not in ('thread', 'process') or order not in ('input', 'completion') \
+            or (workers is not None and workers < 1):
+        raise RequestError('Invalid batch options')
+    max_edge = read_int_field('max_edge', 0, minimum=0, form=form)
+    return pipeline_data, executor, order, workers, max_edge
+
+def batch_lines(images, filenames, pipeline_data, executor: str, order: str, workers=None, max_edge: int = 0):
+    """Process a batch and yield its newline-delimited JSON response lines.
+    
+    Blocks between lines, so asynchronous servers advance it from an
+    executor.
+    """
+    start_time = time.perf_counter()
+    succeeded = 0
+    megapixels = 0.0
+    
+    for item in processor.process_batch(
+        images, pipeline_data,
+        max_workers=workers,
+        use_processes=executor == 'process',
+        ordered=order == 'input',
+        result_cache=disk_cache,
+        priority=Scheduler.BATCH,
+        max_edge=max_edge
+    ):
+        line = {
+            'index': item.index,
+            'filename': filenames[item.index],
+            'success': item.success,
+            'cached': item.cached,
+            'elapsed': round(item.elapsed)
+        }
+        if item.success:
+            succeeded += 1
+            megapixels += item.megapixels
+            line.update({
+                'image': encode_bytes_to_base64(item.data),
+                'processing_time': round(item.processing_time),
+                'step_times': {str(i): round(ms, 2) for i, ms in item.step_times.items()},
+                'megapixels_per_second': round(item.megapixels / (item.elapsed / 1000), 2) if item.elapsed else None
+            })
+        else:
+            line['error'] = item.error
+        yield json.dumps(line) + '\n'
+    
+    total_time = time.perf_counter() - start_time
+    yield json.dumps({
+        'summary': {
+            'images': len(images),
+            'succeeded': succeeded,
+            'failed': len(images) - succeeded,
+            'total_time': round(total_time * 1000),
+            'images_per_second': round(len(images) / total_time, 2) if total_time else None,
+            'megapixels_per_second': round(megapixels / total_time, 2) if total_time else None
+        }
+    }) + '\n'
+
+@bp.route('/api/process_batch', methods=['POST'])
+def process_batch():
+    """Process many images with one pipeline on a worker pool.
+    
+    The response is newline-delimited JSON: one line per image, emitted as
+    soon as it is available, followed by a summary line with aggregate
+    throughput. A 'max_edge' field turns the batch into thumbnails of at
+    most that long edge, with JPEGs decoded at reduced resolution.
+    """
+    files = request.files.getlist('images')
+    if not files:
+        return jsonify({'success': False, 'error': 'No images provided'}), 400
+    
+    try:
+        pipeline_data, executor, order, workers, max_edge = read_batch_options()
+    except RequestError as e:
+        return e.response()
+    
+    # Uploads must be read while the request is still active
+    filenames = [file.filename for file in files]
+    images = [file.read() for file in files]
+    
+    return Response(batch_lines(images, filenames, pipeline_data, executor, order, workers, max_edge),
+                    mimetype='application/x-ndjson')
+
+@bp.route('/api/cache', methods=['GET'])
+def cache_stats():
+    """Return counters of the result disk cache and of request deduplication."""
+    return jsonify({
+        'success': True,
+        'disk': disk_cache.stats(),
+        'single_flight': processor.flights.stats()
+    })
+
+@bp.route('/api/scheduler', methods=['GET'])
+def scheduler_stats():
+    """Return queue depth, running count and wait times per priority class."""
+    return jsonify({'success': True, **processor.scheduler.stats(), 'cpu': processor.cpu.stats()})
+
+@bp.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue a pipeline for background execution and return its job ID."""
+    try:
+        pipeline_data = read_json_field('pipeline')
+        handle, image_data = read_image_source()
+        action, _cost, _edge = admit(pipeline_data, source_shape(handle, image_data), interactive=False)
+        image, _ = load_image(handle, image_data)
+        image_digest = source_digest(handle, image_data)
+        if action is None:
+            admit(pipeline_data, image.shape, interactive=False)
+    except RequestError as e:
+        return e.response()
+    
+    job = jobs.submit(image, pipeline_data, image_digest,
+                      stream_id=request.form.get('stream_id') or None)
+    return jsonify({'success': True, **job.to_dict()}), 202
+
+def job_status(job_id: str, wait: float = 0):
+    """Describe a job, waiting up to ``wait`` seconds for it to finish.
+    
+    Returns:
+        Tuple[dict, int]: The response body and status code.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return UNKNOWN_JOB, 404
+    if wait > 0:
+        job.wait(min(wait, MAX_JOB_WAIT))
+    return {'success': True, **job.to_dict()}, 200
+
+def job_result(job_id: str, wait: float = 0):
+    """Return a finished job's image, waiting up to ``wait`` seconds for it.
+    
+    Returns:
+        Tuple[dict, int]: The response body and status code, 202 while the
+            job is still queued or running.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return UNKNOWN_JOB, 404
+    if wait > 0:
+        job.wait(min(wait, MAX_JOB_WAIT))
+    
+    if job.status == job.FAILED:
+        return {'success': False, **job.to_dict()}, 500
+    if job.status == job.CANCELLED:
+        return {'success': False, **job.to_dict()}, 409
+    if job.status != job.DONE:
+        return {'success': False, **job.to_dict()}, 202
+    
+    return {
+        'success': True,
+        'image': encode_bytes_to_base64(job.result),
+        'processing_time': round(job.processing_time)
+    }, 200
+
+def cancel_job(job_id: str):
+    """Cancel a job; it stops at its next step.
+    
+    Returns:
+        Tuple[dict, int]: The response body and status code.
+    """
+    job = jobs.cancel(job_id)
+    if job is None:
+        return UNKNOWN_JOB, 404
+    return {'success': True, **job.to_dict()}, 200
+
+@bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Return the status and progress of a job.
+    
+    With a ``wait`` query parameter, block for up to that many seconds until
+    the job finishes (long-polling).
+    """
+    body, status = job_status(job_id, request.args.get('wait', 0, type=float))
+    return jsonify(body), status
+
+@bp.route('/api/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    """Cancel a queued or running job."""
+    body, status = cancel_job(job_id)
+    return jsonify(body), status
+
+@bp.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """Return the processed image of a finished job."""
+    body, status = job_result(job_id, request.args.get('wait', 0, type=float))
+    return jsonify(body), status
+
 @bp.route('/static/<path:filename>')
 def serve_static(filename):
     """Serve static files."""
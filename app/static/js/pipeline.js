@@ -4,6 +4,9 @@ class Pipeline {
         this.availableOperations = [];
         this.categories = {};
         this.currentImage = null;
+        this.imageHandle = null;
+        // Lets the server drop this client's superseded requests
+        this.clientId = Math.random().toString(36).slice(2) + Date.now().toString(36);
         this.isProcessing = false;
         this.viewMode = 'list'; // 'list' or 'grid'
         this.previewSteps = new Set();
@@ -636,7 +639,6 @@ class Pipeline {
             }));
 
             const formData = new FormData();
-            formData.append('image', this.currentImage);
             formData.append('pipeline', JSON.stringify(this.steps));
             
             // Prepare preview data before fetch
@@ -645,18 +647,39 @@ class Pipeline {
                 document.querySelector(`#preview-${stepIndex}:not([style*="display: none"])`)
             );
             formData.append('preview_steps', JSON.stringify(activePreviewSteps));
+            formData.append('client_id', this.clientId);
             
-            // Process image
-            const response = await fetch('/api/process', {
-                method: 'POST',
-                body: formData
-            });
+            // Process image, showing step previews as soon as they are ready
+            const response = await this.postProcess(formData, '/api/process/stream');
+            
+            if (response.status === 409) {
+                // Superseded by a newer request, whose result will be shown
+                return;
+            }
             
             if (!response.ok) {
                 throw new Error(await response.text() || 'Image processing failed');
             }
             
-            const result = await response.json();
+            let result = null;
+            if ((response.headers.get('Content-Type') || '').startsWith('text/event-stream')) {
+                await this.readEvents(response, (event, data) => {
+                    if (event === 'step') {
+                        this.updateStepPreview(data.index, data.image);
+                    } else {
+                        result = data;
+                    }
+                });
+                if (result && result.cancelled) {
+                    // Superseded by a newer request, whose result will be shown
+                    return;
+                }
+                if (!result) {
+                    throw new Error('Processing stream ended unexpectedly');
+                }
+            } else {
+                result = await response.json();
+            }
             
             if (result.success) {
                 // Update processing time from backend
@@ -674,14 +697,7 @@ class Pipeline {
                 if (result.intermediate_results) {
                     const previewUpdates = Object.entries(result.intermediate_results);
                     for (const [stepIndex, imageData] of previewUpdates) {
-                        const previewContainer = document.querySelector(`#preview-${stepIndex}`);
-                        if (previewContainer) {
-                            const previewImg = previewContainer.querySelector('.preview-image');
-                            if (previewImg) {
-                                previewImg.src = imageData;
-                                previewImg.style.display = 'block';
-                            }
-                        }
+                        this.updateStepPreview(stepIndex, imageData);
                     }
                 }
 
@@ -724,6 +740,40 @@ class Pipeline {
         }
     }
 
+    updateStepPreview(stepIndex, imageData) {
+        const previewContainer = document.querySelector(`#preview-${stepIndex}`);
+        if (previewContainer) {
+            const previewImg = previewContainer.querySelector('.preview-image');
+            if (previewImg) {
+                previewImg.src = imageData;
+                previewImg.style.display = 'block';
+            }
+        }
+    }
+
+    async readEvents(response, onEvent) {
+        // Parse a server-sent event stream, calling onEvent(event, data) for each event
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += value;
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                let event = 'message';
+                let data = '';
+                for (const line of block.split('\n')) {
+                    if (line.startsWith('event: ')) event = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                }
+                onEvent(event, JSON.parse(data));
+            }
+        }
+    }
+
     showNotification(type, message, duration = 1500) {
         const existingNotification = document.querySelector('.notification');
         if (existingNotification) {
@@ -760,11 +810,47 @@ class Pipeline {
         );
     }
 
+    async uploadImage() {
+        // Upload the current image once; later requests refer to it by handle
+        if (!this.imageHandle) {
+            const formData = new FormData();
+            formData.append('image', this.currentImage);
+            const response = await fetch('/api/images', {
+                method: 'POST',
+                body: formData
+            });
+            if (!response.ok) {
+                throw new Error(await response.text() || 'Image upload failed');
+            }
+            this.imageHandle = (await response.json()).image_handle;
+        }
+        return this.imageHandle;
+    }
+
+    async postProcess(formData, url = '/api/process') {
+        // Process the current image by handle, uploading it again if the handle expired
+        formData.set('image_handle', await this.uploadImage());
+        let response = await fetch(url, {
+            method: 'POST',
+            body: formData
+        });
+        if (response.status === 404) {
+            this.imageHandle = null;
+            formData.set('image_handle', await this.uploadImage());
+            response = await fetch(url, {
+                method: 'POST',
+                body: formData
+            });
+        }
+        return response;
+    }
+
     setImage(file) {
         // Clear previous image and related data
         if (this.currentImage) {
             URL.revokeObjectURL(this.currentImage);
         }
+        this.imageHandle = null;
         
         this.validateImage(file)
             .then(() => {
@@ -1282,13 +1368,9 @@ class Pipeline {
         try {
             // Create a form data with just the steps up to this index
             const formData = new FormData();
-            formData.append('image', this.currentImage);
             formData.append('pipeline', JSON.stringify(this.steps.slice(0, stepIndex + 1)));
             
-            const response = await fetch('/api/process', {
-                method: 'POST',
-                body: formData
-            });
+            const response = await this.postProcess(formData);
             
             if (!response.ok) {
                 throw new Error('Failed to process step output');
@@ -1317,6 +1399,7 @@ class Pipeline {
             URL.revokeObjectURL(this.currentImage);
             this.currentImage = null;
         }
+        this.imageHandle = null;
 
         // Reset file input
         const fileInput = document.getElementById('file-input');
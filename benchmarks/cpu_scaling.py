@@ -0,0 +1,66 @@
+"""Throughput of concurrent pipeline runs with and without the CPU budget.
+
+Runs the same pipeline from an increasing number of threads, once with
+OpenCV's default thread pool left alone, as the processor does by default,
+and once with a CpuBudget sizing it from the number of active runs, and
+prints images per second for each.
+
+Usage:
+    python benchmarks/cpu_scaling.py [--size 2000] [--images 32] [--concurrency 1 2 4 8]
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.image_processing.cpu_budget import CpuBudget
+from app.image_processing.processor import ImageProcessor
+
+PIPELINE = [
+    {'id': 'blur', 'params': {'radius': 15}},
+    {'id': 'saturation', 'params': {'value': 20}},
+    {'id': 'hue', 'params': {'value': 30}},
+    {'id': 'denoise', 'params': {'method': 'gaussian', 'strength': 20}},
+    {'id': 'morphology', 'params': {'operation': 'close', 'kernel_size': 5}}
+]
+
+def measure(processor: ImageProcessor, image: np.ndarray, images: int, concurrency: int) -> float:
+    """Return images per second for ``images`` runs on ``concurrency`` threads."""
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start_time = time.perf_counter()
+        list(executor.map(lambda _: processor.run_pipeline(image, PIPELINE), range(images)))
+        return images / (time.perf_counter() - start_time)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=2000, help='Edge length of the square test image')
+    parser.add_argument('--images', type=int, default=32, help='Runs per measurement')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    image = np.random.default_rng(0).integers(0, 256, (args.size, args.size, 3), dtype=np.uint8)
+    default_threads = cv2.getNumThreads()
+
+    # Without set_threads OpenCV keeps its default pool whatever the load
+    unmanaged = ImageProcessor(cache_bytes=0)
+    managed = ImageProcessor(cache_bytes=0, cpu=CpuBudget(set_threads=cv2.setNumThreads))
+    cv2.setNumThreads(default_threads)
+
+    print(f"{os.cpu_count()} cores, OpenCV default {default_threads} threads, "
+          f"{args.size}x{args.size} image, {args.images} runs")
+    print(f"{'threads':>8} {'default img/s':>14} {'budget img/s':>13} {'gain':>7}")
+
+    for concurrency in args.concurrency:
+        cv2.setNumThreads(default_threads)
+        baseline = measure(unmanaged, image, args.images, concurrency)
+        budgeted = measure(managed, image, args.images, concurrency)
+        print(f"{concurrency:>8} {baseline:>14.2f} {budgeted:>13.2f} {budgeted / baseline - 1:>+7.1%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Startup cost of the processor with lazy and eager operation loading.
+
+Each measurement runs in a fresh interpreter: it imports the processor,
+runs a brightness-only pipeline on a small image and reports the time to
+the first result, the peak resident memory and how many operation modules
+were imported. The eager variant calls ``ImageProcessor.preload()`` first,
+as the server launcher does, which imports every operation and loads
+their resources like the processor's constructor used to.
+
+Usage:
+    python benchmarks/startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import json, resource, sys, time
+start_time = time.perf_counter()
+import numpy as np
+from app.image_processing.processor import ImageProcessor
+processor = ImageProcessor(cache_bytes=0)
+if {eager}:
+    processor.preload()
+ready = time.perf_counter()
+image = np.full((512, 512, 3), 100, np.uint8)
+processor.run_pipeline(image, [{{'id': 'brightness', 'params': {{'value': 20}}}}])
+done = time.perf_counter()
+print(json.dumps({{
+    'startup_ms': (ready - start_time) * 1000,
+    'first_result_ms': (done - start_time) * 1000,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modules': sum(1 for name in sys.modules if name.startswith('app.image_processing.operations.'))
+}}))
+'''
+
+def measure(eager: bool) -> dict:
+    """Run the child once and return its measurements."""
+    output = subprocess.run([sys.executable, '-c', CHILD.format(eager=eager)], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per variant')
+    args = parser.parse_args()
+
+    print(f"{'loading':>8} {'startup ms':>11} {'first result ms':>16} {'peak RSS MB':>12} {'op modules':>11}")
+    for name, eager in (('lazy', False), ('eager', True)):
+        runs = [measure(eager) for _ in range(args.runs)]
+        median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(f"{name:>8} {median['startup_ms']:>11.1f} {median['first_result_ms']:>16.1f} "
+              f"{median['rss_mb']:>12.1f} {median['modules']:>11.0f}")
+
+if __name__ == '__main__':
+    main()
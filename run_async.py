@@ -0,0 +1,7 @@
+from aiohttp import web
+from app.aio import create_aio_app
+
+app = create_aio_app()
+
+if __name__ == '__main__':
+    web.run_app(app, port=5001)
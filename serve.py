@@ -0,0 +1,186 @@
+"""Production launcher: pre-forked WSGI workers sharing one listening socket.
+
+The parent imports the application and loads every operation and its
+resources (e.g. Haar cascades) once, so the workers it forks share those
+pages copy-on-write. Each worker then runs
+warm-up pipelines on a synthetic image, which triggers OpenCV's lazy
+initialization, before it reports ready and starts accepting connections.
+Cold-start times are logged. Workers that die are replaced.
+
+Workers serve requests on threads, so a server-sent event stream or a
+long-poll only holds one thread. Image handles, jobs and 'ref' results
+live in the memory of the worker that created them, and the kernel hands
+each connection to whichever worker accepts it first, so a follow-up
+request can reach a worker that does not know them. The bundled UI
+uploads each image once and then refers to its handle, so it breaks with
+"Unknown or expired image handle" errors behind several workers.
+
+The launcher therefore refuses to start more than one worker unless
+--stateless-clients confirms that every client sends its image with each
+request, uses the json or multipart transports, and neither polls jobs
+nor asks for refinements or a budget that queues jobs.
+
+Usage:
+    python serve.py [--host 0.0.0.0] [--port 5000] [--no-threads] [--cpu-budget]
+                    [--warmup all|none|PIPELINE_JSON] [--warmup-size 128]
+    python serve.py --workers 4 --stateless-clients [...]
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import numpy as np
+from werkzeug.serving import make_server
+
+logger = logging.getLogger('serve')
+
+def synthetic_image(size: int) -> np.ndarray:
+    """A textured test image, so detectors and segmenters find something."""
+    gradient = np.linspace(0, 255, size, dtype=np.float32)
+    image = np.stack([
+        np.tile(gradient, (size, 1)),
+        np.tile(gradient[:, None], (1, size)),
+        np.full((size, size), 128, np.float32)
+    ], axis=-1)
+    noise = np.random.default_rng(0).normal(0, 20, image.shape)
+    return np.clip(image + noise, 0, 255).astype(np.uint8)
+
+def warmup_pipelines(processor, spec: str, operation_ids):
+    """Return the pipelines a worker runs before it reports ready.
+
+    'all' runs every loaded operation on its own with default parameters,
+    except stateful ones, which would leave state in the default stream.
+    """
+    if spec == 'none':
+        return []
+    if spec == 'all':
+        return [[{'id': operation_id, 'params': {}}] for operation_id in operation_ids
+                if not processor.bind_operation(operation_id, {}).stateful]
+    return [json.loads(spec)]
+
+def run_worker(index: int, listener: socket.socket, app, args, pipelines, ready_fd: int) -> None:
+    """Warm up a forked worker, report it ready and serve until killed."""
+    from app import routes
+
+    start_time = time.perf_counter()
+    if args.cpu_budget:
+        import cv2
+        from app.image_processing.cpu_budget import CpuBudget
+        # Workers share the machine's cores rather than each claiming them all
+        routes.processor.cpu = CpuBudget(cores=max(1, (os.cpu_count() or 1) // args.workers),
+                                         set_threads=cv2.setNumThreads)
+
+    image = synthetic_image(args.warmup_size)
+    for pipeline in pipelines:
+        try:
+            routes.processor.run_pipeline(image, pipeline)
+        except Exception as e:
+            logger.warning(f"Warm-up of {[entry['id'] for entry in pipeline]} failed: {str(e)}")
+    warmup_ms = (time.perf_counter() - start_time) * 1000
+
+    server = make_server(args.host, args.port, app, threaded=args.threads, fd=listener.fileno())
+    message = {'worker': index, 'pid': os.getpid(), 'warmup_ms': round(warmup_ms)}
+    os.write(ready_fd, (json.dumps(message) + '\n').encode('utf-8'))
+    server.serve_forever()
+
+def main() -> None:
+    launch_time = time.perf_counter()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes; more than one needs --stateless-clients')
+    parser.add_argument('--stateless-clients', action='store_true',
+                        help="Allow several workers: clients use no image handles, jobs or 'ref' "
+                             "results, which live in one worker's memory (the bundled UI does)")
+    parser.add_argument('--threads', action=argparse.BooleanOptionalAction, default=True,
+                        help='Serve requests on threads within each worker')
+    parser.add_argument('--cpu-budget', action='store_true',
+                        help="Size OpenCV's thread pool from the concurrent runs instead of "
+                             "leaving OpenCV's default; unmeasured on multi-core hosts")
+    parser.add_argument('--warmup', default='all', help="'all', 'none' or a pipeline as JSON")
+    # OpenCV initializes per function rather than per image size, so a
+    # small image is enough
+    parser.add_argument('--warmup-size', type=int, default=128, help='Edge length of the warm-up image')
+    args = parser.parse_args()
+    if args.workers > 1 and not args.stateless_clients:
+        parser.error("image handles, jobs and 'ref' results are only known to the worker that "
+                     "created them, which breaks the bundled UI; pass --stateless-clients to run "
+                     "several workers anyway")
+    logging.basicConfig(level=logging.INFO)
+    if args.workers > 1:
+        logger.warning("Image handles, jobs and 'ref' results are only known to the worker that created them")
+
+    from app import create_app, routes
+    app = create_app()
+    load_times = routes.processor.preload()
+    routes.operation_catalog()
+    pipelines = warmup_pipelines(routes.processor, args.warmup, load_times)
+    logger.info(f"Loaded the application and {len(load_times)} operations in "
+                f"{(time.perf_counter() - launch_time) * 1000:.0f} ms")
+
+    listener = socket.create_server((args.host, args.port), backlog=128)
+    read_fd, ready_fd = os.pipe()
+    workers = {}
+    stopping = False
+
+    def spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                run_worker(index, listener, app, args, pipelines, ready_fd)
+            finally:
+                os._exit(1)
+        workers[pid] = index
+
+    def report_ready() -> None:
+        ready = 0
+        with os.fdopen(read_fd) as messages:
+            for line in messages:
+                message = json.loads(line)
+                ready += 1
+                elapsed = (time.perf_counter() - launch_time) * 1000
+                logger.info(f"Worker {message['worker']} (pid {message['pid']}) ready after "
+                            f"{message['warmup_ms']} ms of warm-up, {elapsed:.0f} ms after launch")
+                if ready == args.workers:
+                    logger.info(f"All {args.workers} workers ready {elapsed:.0f} ms after launch, "
+                                f"serving on http://{args.host}:{args.port}")
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for index in range(args.workers):
+        spawn(index)
+    threading.Thread(target=report_ready, daemon=True).start()
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = workers.pop(pid, None)
+        if index is not None and not stopping:
+            logger.warning(f"Worker {index} (pid {pid}) exited with status {status}, restarting it")
+            spawn(index)
+    sys.exit(0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,13 @@
+"""Shared fixtures. Run from the repository root with ``python -m pytest``."""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def image() -> np.ndarray:
+    """A small, noisy color image."""
+    return np.random.default_rng(0).integers(0, 256, (96, 128, 3), dtype=np.uint8)
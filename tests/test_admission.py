@@ -0,0 +1,35 @@
+"""Cost budget decisions and the fitting edge of downscaled runs."""
+
+import pytest
+from app.image_processing.admission import CostBudget
+
+def test_decides_by_estimated_cost():
+    budget = CostBudget(interactive_ms=100, max_ms=1000, over_budget=CostBudget.ASYNC)
+
+    assert budget.decide(0) == CostBudget.RUN
+    assert budget.decide(100) == CostBudget.RUN
+    assert budget.decide(500) == CostBudget.ASYNC
+    assert budget.decide(1001) == CostBudget.REJECT
+
+def test_rejects_unknown_over_budget_actions():
+    with pytest.raises(ValueError):
+        CostBudget(over_budget='drop')
+
+def test_fitting_edge_shrinks_with_the_square_root_of_the_overshoot():
+    budget = CostBudget(interactive_ms=100)
+
+    assert budget.fitting_edge((1000, 2000), 400) == 1000
+    assert budget.fitting_edge((1000, 2000), 10 ** 9) >= 1
+
+@pytest.mark.parametrize('cost_ms', [0, 50, 100])
+def test_fitting_edge_keeps_pipelines_within_the_budget_whole(cost_ms):
+    assert CostBudget(interactive_ms=100).fitting_edge((300, 400), cost_ms) == 400
+
+@pytest.mark.parametrize('pipeline', [[], [{'id': 'unknown', 'params': {}}]])
+def test_admits_pipelines_estimated_at_nothing(pipeline):
+    from app import routes
+
+    action, cost, _edge = routes.admit(pipeline, (480, 640))
+
+    assert action == CostBudget.RUN
+    assert cost == 0
@@ -0,0 +1,46 @@
+"""LRUCache size bound, recency order and expiry."""
+
+import numpy as np
+from app.image_processing import cache
+from app.image_processing.cache import LRUCache
+
+def test_evicts_least_recently_used_entries():
+    lru = LRUCache(max_bytes=30)
+    lru.put('a', b'x' * 10)
+    lru.put('b', b'x' * 10)
+    lru.put('c', b'x' * 10)
+    assert lru.get('a') is not None
+
+    lru.put('d', b'x' * 10)
+
+    assert 'b' not in lru
+    assert all(key in lru for key in ('a', 'c', 'd'))
+    assert lru.size == 30
+
+def test_sizes_arrays_by_their_bytes():
+    lru = LRUCache(max_bytes=1000)
+    lru.put('frame', np.zeros((10, 10, 3), np.uint8))
+    lru.put('frame', np.zeros((10, 20, 3), np.uint8))
+
+    assert lru.size == 600
+    assert len(lru) == 1
+
+def test_never_stores_values_larger_than_the_budget():
+    lru = LRUCache(max_bytes=10)
+    lru.put('small', b'x' * 5)
+    lru.put('large', b'x' * 11)
+
+    assert 'large' not in lru
+    assert 'small' in lru
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    lru = LRUCache(max_bytes=100, ttl=5)
+    lru.put('a', b'x')
+
+    now[0] += 4
+    assert lru.get('a') == b'x'
+    now[0] += 2
+    assert lru.get('a') is None
+    assert lru.size == 0
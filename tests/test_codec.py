@@ -0,0 +1,37 @@
+"""Reduced-resolution decoding."""
+
+import cv2
+import numpy as np
+import pytest
+from app.image_processing.codec import decode_image, decode_reduced
+
+@pytest.fixture(scope='module')
+def jpeg() -> bytes:
+    image = np.random.default_rng(3).integers(0, 256, (800, 1000, 3), dtype=np.uint8)
+    return cv2.imencode('.jpg', image)[1].tobytes()
+
+@pytest.mark.parametrize('max_edge, shape, scale', [
+    (100, (100, 125), 1 / 8),
+    (125, (100, 125), 1 / 8),
+    (126, (200, 250), 1 / 4),
+    (300, (400, 500), 1 / 2),
+    (500, (400, 500), 1 / 2),
+    (501, (800, 1000), 1.0),
+    (0, (800, 1000), 1.0)
+])
+def test_picks_the_smallest_scale_covering_the_edge(jpeg, max_edge, shape, scale):
+    image, decoded_scale = decode_reduced(jpeg, max_edge)
+
+    assert image.shape[:2] == shape
+    assert decoded_scale == scale
+
+def test_decodes_other_formats_at_full_resolution(image):
+    png = cv2.imencode('.png', image)[1].tobytes()
+
+    decoded, scale = decode_reduced(png, 16)
+
+    assert scale == 1.0
+    np.testing.assert_array_equal(decoded, decode_image(png))
+
+def test_reports_undecodable_data():
+    assert decode_reduced(b'not an image', 100) == (None, 1.0)
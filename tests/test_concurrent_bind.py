@@ -0,0 +1,75 @@
+"""Concurrent runs binding the same operations to different parameters."""
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import numpy as np
+from app.image_processing.processor import ImageProcessor
+
+# Every operation appears with several parameter sets, so concurrent runs
+# bind the same shared instance differently
+PIPELINES = [
+    [{'id': 'blur', 'params': {'radius': radius}}] for radius in (1, 3, 5, 9)
+] + [
+    [{'id': 'brightness', 'params': {'value': value}}, {'id': 'contrast', 'params': {'value': -value}}]
+    for value in (-40, 0, 25, 60)
+] + [
+    [{'id': 'canny_edge', 'params': {'threshold1': low, 'threshold2': low * 2}}] for low in (20, 80, 150)
+] + [
+    [{'id': 'morphology', 'params': {'operation': operation, 'kernel_size': 5}}]
+    for operation in ('dilate', 'erode', 'open')
+] + [
+    [{'id': 'rotate', 'params': {'angle': angle}}, {'id': 'sharpen', 'params': {'amount': angle}}]
+    for angle in (15, 45, 90)
+]
+
+def test_threaded_runs_match_serial_runs(image):
+    processor = ImageProcessor(cache_bytes=0)
+    expected = [processor.run_pipeline(image, pipeline).image for pipeline in PIPELINES]
+
+    runs = [i % len(PIPELINES) for i in range(20 * len(PIPELINES))]
+    np.random.default_rng(1).shuffle(runs)
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(lambda i: processor.run_pipeline(image, PIPELINES[i]).image, runs))
+
+    for i, result in zip(runs, results):
+        np.testing.assert_array_equal(result, expected[i], err_msg=str(PIPELINES[i]))
+
+def test_binding_leaves_the_shared_instance_untouched():
+    processor = ImageProcessor(cache_bytes=0)
+    defaults = processor.get_operation_params('blur')
+    bound = processor.bind_operation('blur', {'radius': 11})
+
+    assert bound.get_params()['radius'] == 11
+    assert processor.get_operation_params('blur') == defaults
+
+class RecordingClassifier:
+    """Stands in for cv2.CascadeClassifier, recording overlapping calls."""
+
+    overlaps = 0
+
+    def __init__(self, _path):
+        self._lock = threading.Lock()
+
+    def detectMultiScale(self, gray, **_params):
+        if not self._lock.acquire(blocking=False):
+            RecordingClassifier.overlaps += 1
+            self._lock.acquire()
+        try:
+            time.sleep(0.002)
+            return []
+        finally:
+            self._lock.release()
+
+def test_haar_classifiers_are_never_shared_by_concurrent_runs(image, monkeypatch):
+    from app.image_processing.operations import opencv_detection
+    monkeypatch.setattr(opencv_detection.cv2, 'CascadeClassifier', RecordingClassifier, raising=False)
+    monkeypatch.setattr(opencv_detection.HaarCascadeDetectionOperation, '_cascades', {})
+
+    processor = ImageProcessor(cache_bytes=0)
+    pipeline = [{'id': 'haar_cascade', 'params': {'detector': 'face'}}]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: processor.run_pipeline(image, pipeline), range(64)))
+
+    assert RecordingClassifier.overlaps == 0
+    assert 1 <= len(opencv_detection.HaarCascadeDetectionOperation._cascades['face']) <= 8
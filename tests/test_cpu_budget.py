@@ -0,0 +1,22 @@
+"""Sharing of cores with OpenCV's thread pool."""
+
+import cv2
+from app.image_processing.cpu_budget import CpuBudget
+from app.image_processing.processor import ImageProcessor
+
+def test_default_leaves_opencv_threading_alone(image):
+    threads = cv2.getNumThreads()
+    processor = ImageProcessor(cache_bytes=0)
+    processor.run_pipeline(image, [{'id': 'blur', 'params': {'radius': 3}}])
+    assert cv2.getNumThreads() == threads
+    assert processor.cpu.stats()['managed'] is False
+
+def test_budget_splits_cores_between_runs():
+    applied = []
+    budget = CpuBudget(cores=4, set_threads=applied.append)
+    with budget.run():
+        with budget.run():
+            assert budget.threads == 2
+        with budget.run(), budget.run(), budget.run(), budget.run():
+            assert budget.threads == 1
+    assert applied == [4, 2, 4, 2, 1, 2, 4]
@@ -0,0 +1,82 @@
+"""DiskCache eviction, reopening and sharing between processes."""
+
+import os
+from app.image_processing.disk_cache import DiskCache
+
+def put_aged(disk: DiskCache, key: str, data: bytes, age: float) -> None:
+    """Store an entry last used ``age`` seconds ago, whatever the file system's timestamp resolution."""
+    disk.put(key, data)
+    used = 10 ** 9 - age
+    os.utime(os.path.join(disk.directory, key[:2], key), (used, used))
+
+def test_evicts_least_recently_used_files_down_to_the_low_water_mark(tmp_path):
+    disk = DiskCache(str(tmp_path), max_bytes=40)
+    for age, key in ((40, 'aa1'), (30, 'bb2'), (20, 'cc3'), (10, 'dd4')):
+        put_aged(disk, key, b'x' * 10, age)
+
+    disk.put('ee5', b'x' * 10)
+
+    assert disk.get('aa1') is None
+    assert disk.get('bb2') is None
+    assert not os.path.exists(os.path.join(tmp_path, 'aa', 'aa1'))
+    assert all(disk.get(key) is not None for key in ('cc3', 'dd4', 'ee5'))
+    assert disk.stats()['evictions'] == 2
+    assert disk.stats()['bytes'] == 30
+
+def test_reading_an_entry_marks_it_recently_used(tmp_path):
+    disk = DiskCache(str(tmp_path), max_bytes=30)
+    for age, key in ((30, 'aa1'), (20, 'bb2'), (10, 'cc3')):
+        put_aged(disk, key, b'x' * 10, age)
+    assert disk.get('aa1') is not None
+
+    disk.put('dd4', b'x' * 10)
+
+    assert disk.get('bb2') is None
+    assert disk.get('aa1') is not None
+
+def test_skips_data_larger_than_the_budget(tmp_path):
+    disk = DiskCache(str(tmp_path), max_bytes=10)
+    disk.put('aa1', b'x' * 11)
+
+    assert disk.get('aa1') is None
+    assert disk.stats()['entries'] == 0
+
+def test_reopening_restores_entries_in_last_use_order(tmp_path):
+    disk = DiskCache(str(tmp_path), max_bytes=100)
+    for age, key in ((10, 'aa1'), (20, 'bb2'), (30, 'cc3')):
+        put_aged(disk, key, b'x' * 10, age)
+
+    reopened = DiskCache(str(tmp_path), max_bytes=25)
+
+    assert reopened.stats()['entries'] == 2
+    assert reopened.get('cc3') is None
+    assert reopened.get('aa1') == b'x' * 10
+
+def test_processes_sharing_a_directory_keep_it_within_budget(tmp_path):
+    first = DiskCache(str(tmp_path), max_bytes=50)
+    second = DiskCache(str(tmp_path), max_bytes=50)
+    for i in range(3):
+        put_aged(first, f'a{i}', b'x' * 10, 60 - i)
+        put_aged(second, f'b{i}', b'x' * 10, 50 - i)
+
+    # Each process counted only its own 30 bytes; this write pushes the
+    # first over budget and its scan finds the second's files too
+    first.put('a3', b'x' * 30)
+
+    on_disk = sum(os.path.getsize(os.path.join(root, name))
+                  for root, _dirs, names in os.walk(tmp_path) for name in names)
+    assert on_disk == first.stats()['bytes'] == 40
+    assert second.get('b1') is None
+    assert second.get('b2') is not None
+
+def test_rescans_after_the_scan_interval(tmp_path):
+    first = DiskCache(str(tmp_path), max_bytes=30, scan_interval=0)
+    second = DiskCache(str(tmp_path), max_bytes=30, scan_interval=0)
+    for i in range(3):
+        put_aged(second, f'b{i}', b'x' * 10, 50 - i)
+
+    put_aged(first, 'a0', b'x' * 10, 0)
+
+    assert first.stats()['bytes'] <= 30
+    assert first.get('b0') is None
+    assert first.get('a0') is not None
@@ -0,0 +1,20 @@
+"""Lazy loading of operations and eager preloading."""
+
+import cv2
+import pytest
+from app.image_processing.processor import ImageProcessor
+
+def test_preload_reports_every_loadable_operation():
+    times = ImageProcessor(cache_bytes=0).preload()
+
+    assert {'brightness', 'blur', 'canny_edge'} <= set(times)
+    assert all(ms >= 0 for ms in times.values())
+
+@pytest.mark.skipif(not hasattr(cv2, 'CascadeClassifier'), reason='OpenCV build without Haar cascades')
+def test_preload_parses_every_haar_cascade(monkeypatch):
+    from app.image_processing.operations.opencv_detection import HaarCascadeDetectionOperation
+    monkeypatch.setattr(HaarCascadeDetectionOperation, '_cascades', {})
+
+    ImageProcessor(cache_bytes=0).preload()
+
+    assert set(HaarCascadeDetectionOperation._cascades) == set(HaarCascadeDetectionOperation.CASCADE_FILES)
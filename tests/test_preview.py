@@ -0,0 +1,50 @@
+"""Proxy-resolution previews."""
+
+import numpy as np
+import pytest
+from app.image_processing.processor import ImageProcessor
+
+SUBTRACT = [{'id': 'background_subtraction', 'params': {'method': 'mog2', 'min_area': 10}}]
+
+def scene(x=None) -> np.ndarray:
+    """A flat background, with a bright square at ``x`` if given."""
+    frame = np.full((120, 160, 3), 60, np.uint8)
+    if x is not None:
+        frame[40:80, x:x + 40] = 255
+    return frame
+
+def test_scales_pixel_parameters_with_the_proxy(image):
+    processor = ImageProcessor(cache_bytes=0)
+    result = processor.run_preview(image, [{'id': 'blur', 'params': {'radius': 9}}], max_edge=64)
+
+    assert max(result.image.shape[:2]) == 64
+    assert result.scale == 0.5
+
+@pytest.mark.parametrize('stream_id', ['a', None])
+def test_streams_keep_separate_preview_state(stream_id):
+    background, moved = [scene()] * 5, scene(90)
+    reference = ImageProcessor(cache_bytes=0)
+    for frame in background:
+        reference.run_preview(frame, SUBTRACT, 64, stream_id=stream_id)
+    expected = reference.run_preview(moved, SUBTRACT, 64, stream_id=stream_id).image
+
+    processor = ImageProcessor(cache_bytes=0)
+    for x, frame in enumerate(background):
+        processor.run_preview(frame, SUBTRACT, 64, stream_id=stream_id)
+        processor.run_preview(scene(x * 20), SUBTRACT, 64, stream_id='b')
+        processor.run_preview(scene(x * 30), SUBTRACT, 64, stream_id='c')
+    # Full-resolution frames of the stream, e.g. refinements, keep their own
+    # state rather than resetting the proxies' model
+    processor.run_pipeline(moved, SUBTRACT, stream_id=stream_id)
+
+    result = processor.run_preview(moved, SUBTRACT, 64, stream_id=stream_id).image
+    np.testing.assert_array_equal(result, expected)
+
+def test_previews_without_a_stream_leave_full_resolution_state_alone(image):
+    processor = ImageProcessor(cache_bytes=0)
+    flow = [{'id': 'optical_flow', 'params': {}}]
+
+    processor.run_preview(image, flow, max_edge=64)
+    # Would compare a 64 pixel proxy with a full-size frame if they shared state
+    processor.run_pipeline(image, flow)
+    processor.run_preview(image, flow, max_edge=64)
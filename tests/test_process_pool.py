@@ -0,0 +1,55 @@
+"""Pipelines run on worker processes through shared memory."""
+
+from contextlib import contextmanager
+import os
+import cv2
+import numpy as np
+import pytest
+from app.image_processing.process_pool import ProcessPool
+from app.image_processing.processor import ImageProcessor
+
+PIPELINE = [{'id': 'blur', 'params': {'radius': 3}}, {'id': 'sharpen', 'params': {'amount': 80}},
+            {'id': 'grayscale', 'params': {}}]
+
+def shared_blocks():
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+@pytest.fixture(scope='module')
+def pool():
+    pool = ProcessPool(max_workers=2)
+    yield pool
+    pool.shutdown()
+
+def test_pool_matches_in_process_result(image, pool):
+    expected = ImageProcessor(cache_bytes=0).run_pipeline(image, PIPELINE)
+    pooled = ImageProcessor(cache_bytes=0, pool=pool).run_pipeline(image, PIPELINE)
+    np.testing.assert_array_equal(pooled.image, expected.image)
+    assert sorted(pooled.step_times) == sorted(expected.step_times)
+
+def test_pool_runs_skip_the_cpu_budget(image, pool, monkeypatch):
+    processor = ImageProcessor(cache_bytes=0, pool=pool)
+    runs = []
+
+    @contextmanager
+    def run():
+        runs.append(1)
+        yield
+
+    monkeypatch.setattr(processor.cpu, 'run', run)
+    processor.run_pipeline(image, PIPELINE)
+    assert runs == []
+    # Runs the pool cannot take still count
+    processor.run_pipeline(image, PIPELINE, preview_steps=[0])
+    assert runs
+
+def test_pool_frees_shared_memory(image, pool):
+    before = shared_blocks()
+    for _ in range(3):
+        pool.run_pipeline(image, PIPELINE)
+    # A failing run frees its input block as well
+    with pytest.raises(Exception):
+        pool.run_pipeline(image, [{'id': 'blur', 'params': {'radius': -5}}])
+    assert shared_blocks() == before
+
+def test_workers_run_opencv_serially(pool):
+    assert pool.executor.submit(cv2.getNumThreads).result() == 1
@@ -0,0 +1,230 @@
+"""The Flask API, end to end through the test client."""
+
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import asyncio
+import json
+import threading
+import time
+import cv2
+import numpy as np
+import pytest
+from app import create_app, routes
+from app.image_processing.disk_cache import DiskCache
+from app.image_processing.jobs import Job, JobManager
+from app.image_processing.processor import ImageProcessor
+
+PIPELINE = [{'id': 'blur', 'params': {'radius': 3}}, {'id': 'sharpen', 'params': {'amount': 80}}]
+
+def wait_for(condition, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    """The application with a fresh processor and an empty disk cache."""
+    monkeypatch.setattr(routes, 'processor', ImageProcessor())
+    monkeypatch.setattr(routes, 'disk_cache', DiskCache(str(tmp_path), 64 * 1024 * 1024))
+    return create_app()
+
+def process_form(image, **fields):
+    return {
+        'image': (BytesIO(cv2.imencode('.png', image)[1].tobytes()), 'image.png'),
+        'pipeline': json.dumps(PIPELINE),
+        **fields
+    }
+
+def test_identical_requests_share_one_run(app, image, monkeypatch):
+    processor = routes.processor
+    apply_step = processor._apply_step
+
+    def wait_for_follower(*args):
+        wait_for(lambda: processor.flights.stats()['shared'] == 1)
+        return apply_step(*args)
+
+    monkeypatch.setattr(processor, '_apply_step', wait_for_follower)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(app.test_client().post, '/api/process', data=process_form(image))
+        wait_for(lambda: processor.flights.stats()['in_flight'] == 1)
+        follower = executor.submit(app.test_client().post, '/api/process', data=process_form(image))
+        responses = [leader.result(), follower.result()]
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert sorted(response.get_json()['shared'] for response in responses) == [False, True]
+    assert processor.flights.stats()['executions'] == 1
+    assert responses[0].get_json()['image'] == responses[1].get_json()['image']
+
+def test_identical_stream_requests_share_one_run(app, image, monkeypatch):
+    processor = routes.processor
+    apply_step = processor._apply_step
+
+    def wait_for_follower(*args):
+        wait_for(lambda: processor.flights.stats()['shared'] == 1)
+        return apply_step(*args)
+
+    monkeypatch.setattr(processor, '_apply_step', wait_for_follower)
+    form = dict(preview_steps='[0]')
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(app.test_client().post, '/api/process/stream', data=process_form(image, **form))
+        wait_for(lambda: processor.flights.stats()['in_flight'] == 1)
+        follower = executor.submit(app.test_client().post, '/api/process/stream', data=process_form(image, **form))
+        bodies = [leader.result().get_data(as_text=True), follower.result().get_data(as_text=True)]
+
+    assert processor.flights.stats()['executions'] == 1
+    for body in bodies:
+        events = [line.split(': ', 1)[1] for line in body.splitlines() if line.startswith('event: ')]
+        assert events == ['step', 'result']
+
+def aio_form(image, **fields):
+    aiohttp = pytest.importorskip('aiohttp')
+    form = aiohttp.FormData()
+    form.add_field('image', cv2.imencode('.png', image)[1].tobytes(), filename='image.png')
+    form.add_field('pipeline', json.dumps(PIPELINE))
+    for name, value in fields.items():
+        form.add_field(name, value)
+    return form
+
+def run_aio(scenario):
+    """Run the coroutine ``scenario(client)`` against the aio application."""
+    pytest.importorskip('aiohttp')
+    from aiohttp.test_utils import TestClient, TestServer
+    from app import aio
+
+    async def main():
+        client = TestClient(TestServer(aio.create_aio_app()))
+        await client.start_server()
+        try:
+            return await scenario(client)
+        finally:
+            await client.close()
+
+    return asyncio.run(main())
+
+class RecordingPool:
+    """Stands in for a ProcessPool, running pipelines in this process."""
+
+    def __init__(self):
+        self.runs = 0
+        self._processor = ImageProcessor(cache_bytes=0)
+
+    def run_pipeline(self, image, pipeline, cancel=None):
+        self.runs += 1
+        result = self._processor.run_pipeline(image, pipeline, cancel=cancel)
+        return result.image, result.step_times
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = RecordingPool()
+    monkeypatch.setattr(routes.processor, 'pool', pool)
+    return pool
+
+def test_process_runs_in_the_pool(app, image, pool):
+    response = app.test_client().post('/api/process', data=process_form(image))
+    assert response.status_code == 200
+    assert pool.runs == 1
+
+    # Step previews need the steps in this process
+    response = app.test_client().post('/api/process', data=process_form(image, preview_steps='[0]'))
+    assert response.status_code == 200
+    assert pool.runs == 1
+
+def test_aio_process_runs_in_the_pool(app, image, pool):
+    async def scenario(client):
+        response = await client.post('/api/process', data=aio_form(image))
+        return response.status
+
+    assert run_aio(scenario) == 200
+    assert pool.runs == 1
+
+def test_jobs_run_in_the_pool(app, image, pool):
+    manager = JobManager(routes.processor)
+    job = manager.submit(image, PIPELINE, 'digest')
+    assert job.wait(10)
+    assert job.status == Job.DONE
+    assert job.current_step == job.total_steps
+    assert pool.runs == 1
+
+def test_stored_results_are_served_and_revalidated(app, image):
+    client = app.test_client()
+    first = client.post('/api/process', data=process_form(image))
+    etag = first.headers['ETag']
+    assert first.get_json()['cached'] is False
+
+    second = client.post('/api/process', data=process_form(image))
+    assert second.get_json()['cached'] is True
+    assert second.headers['ETag'] == etag
+
+    revalidated = client.post('/api/process', data=process_form(image), headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+
+def test_aio_serves_ref_results_and_jobs(app, image, monkeypatch):
+    monkeypatch.setattr(routes, 'jobs', JobManager(routes.processor))
+    job = routes.jobs.submit(image, PIPELINE)
+
+    async def scenario(client):
+        response = await client.post('/api/process', data=aio_form(image, transport='ref'))
+        url = (await response.json())['image']
+        result = await client.get(url)
+        status = await client.get(f'/api/jobs/{job.id}?wait=10')
+        job_result = await client.get(f'/api/jobs/{job.id}/result')
+        unknown = await client.delete('/api/jobs/unknown')
+        return (result.status, result.content_type, await result.read(), (await status.json())['status'],
+                job_result.status, unknown.status)
+
+    status, content_type, data, job_status, result_status, unknown_status = run_aio(scenario)
+    assert (status, content_type) == (200, 'image/png')
+    assert cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR).shape == image.shape
+    assert job_status == Job.DONE
+    assert result_status == 200
+    assert unknown_status == 404
+
+def test_deleting_a_job_cancels_it(app, image, monkeypatch):
+    monkeypatch.setattr(routes, 'jobs', JobManager(routes.processor, max_workers=1))
+    release = threading.Event()
+    apply_step = routes.processor._apply_step
+
+    def blocked(*args):
+        release.wait(10)
+        return apply_step(*args)
+
+    monkeypatch.setattr(routes.processor, '_apply_step', blocked)
+    running = routes.jobs.submit(image, PIPELINE)
+    queued = routes.jobs.submit(image, PIPELINE[:1])
+
+    client = app.test_client()
+    response = client.delete(f'/api/jobs/{queued.id}')
+    assert response.status_code == 200
+    release.set()
+    assert queued.wait(10) and running.wait(10)
+    assert queued.status == Job.CANCELLED
+    assert running.status == Job.DONE
+    assert client.get(f'/api/jobs/{queued.id}/result').status_code == 409
+
+def test_aio_stream_cancels_on_disconnect_mid_step(app, image, monkeypatch):
+    apply_step = routes.processor._apply_step
+    started = threading.Event()
+    seen = []
+
+    def until_cancelled(step, image, session=None, out=None, cancel=None):
+        started.set()
+        deadline = time.monotonic() + 10
+        while not cancel.cancelled and time.monotonic() < deadline:
+            time.sleep(0.01)
+        seen.append(cancel.cancelled)
+        return apply_step(step, image, session, out, cancel)
+
+    monkeypatch.setattr(routes.processor, '_apply_step', until_cancelled)
+
+    async def scenario(client):
+        response = await client.post('/api/process/stream', data=aio_form(image))
+        assert response.status == 200
+        assert await asyncio.to_thread(started.wait, 10)
+        response.close()
+        deadline = time.monotonic() + 5
+        while not seen and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+
+    run_aio(scenario)
+    assert seen == [True]
@@ -0,0 +1,64 @@
+"""Priority scheduling and per-operation caps."""
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from app.image_processing.processor import ImageProcessor
+from app.image_processing.scheduler import Scheduler
+
+def wait_for(condition, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+def test_cap_is_released_after_its_step():
+    scheduler = Scheduler(max_concurrent=4, operation_limits={'heavy': 1})
+    with scheduler.slot(Scheduler.FINAL) as first:
+        with scheduler.step(first, ['heavy']):
+            assert scheduler.stats()['operations'] == {'heavy': 1}
+        # The rest of the run no longer holds the cap
+        with scheduler.slot(Scheduler.FINAL) as second, scheduler.step(second, ['heavy']):
+            assert scheduler.stats()['operations'] == {'heavy': 1}
+    assert scheduler.stats()['operations'] == {'heavy': 0}
+    assert scheduler.stats()[Scheduler.FINAL]['running'] == 0
+
+def test_run_blocked_on_a_cap_lends_its_slot():
+    scheduler = Scheduler(max_concurrent=2, operation_limits={'heavy': 1})
+    release = threading.Event()
+    order = []
+
+    def run(name, operation_ids, hold=None):
+        with scheduler.slot(Scheduler.FINAL) as ticket:
+            with scheduler.step(ticket, operation_ids):
+                order.append(name)
+                if hold is not None:
+                    hold.wait()
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        holder = executor.submit(run, 'holder', ['heavy'], release)
+        wait_for(lambda: order == ['holder'])
+        blocked = executor.submit(run, 'blocked', ['heavy'])
+        wait_for(lambda: scheduler.stats()[Scheduler.FINAL]['queued'] == 1)
+        # Only one of the two slots is in use while the second run waits for the cap
+        cheap = executor.submit(run, 'cheap', ['light'])
+        cheap.result(timeout=10)
+        release.set()
+        holder.result(timeout=10)
+        blocked.result(timeout=10)
+
+    assert order == ['holder', 'cheap', 'blocked']
+    assert scheduler.stats()[Scheduler.FINAL]['running'] == 0
+
+def test_pipeline_holds_caps_only_during_capped_steps(image):
+    processor = ImageProcessor(cache_bytes=0,
+                               scheduler=Scheduler(max_concurrent=2, operation_limits={'blur': 1}))
+    pipeline = [{'id': 'blur', 'params': {'radius': 3}}, {'id': 'sharpen', 'params': {'amount': 80}},
+                {'id': 'grayscale', 'params': {}}]
+    counts = {}
+
+    def record(index, _result):
+        counts[index] = processor.scheduler.stats()['operations']['blur']
+
+    processor.run_pipeline(image, pipeline, preview_steps=[0, 1], on_step=record, priority=Scheduler.FINAL)
+    assert counts == {0: 0, 1: 0, 2: 0}
@@ -0,0 +1,41 @@
+"""Stream sessions of stateful operations."""
+
+from app.image_processing import sessions
+from app.image_processing.processor import ImageProcessor
+from app.image_processing.sessions import SessionStore
+
+SUBTRACT = [{'id': 'background_subtraction', 'params': {'method': 'mog2'}}]
+
+def test_sessions_are_kept_per_stream(image):
+    processor = ImageProcessor(cache_bytes=0)
+    for stream_id in ('a', 'b', 'a', None):
+        processor.run_pipeline(image, SUBTRACT, stream_id=stream_id)
+
+    assert len(processor.sessions) == 3
+
+def test_idle_sessions_are_evicted_including_the_default(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(sessions.time, 'monotonic', lambda: now[0])
+    store = SessionStore(idle_timeout=10)
+    for stream_id in ('a', None):
+        with store.open(stream_id):
+            pass
+
+    now[0] += 5
+    with store.open('b'):
+        pass
+    assert len(store) == 3
+
+    now[0] += 8
+    with store.open('b'):
+        pass
+    assert len(store) == 1
+
+def test_least_recently_used_sessions_are_evicted_over_budget(image):
+    processor = ImageProcessor(cache_bytes=0, session_bytes=1)
+    processor.run_pipeline(image, SUBTRACT)
+    processor.run_pipeline(image, SUBTRACT, stream_id='a')
+
+    # Every session is over a one-byte budget once it holds a model
+    assert len(processor.sessions) == 0
+    assert processor.sessions.nbytes == 0
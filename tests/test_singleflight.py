@@ -0,0 +1,110 @@
+"""Deduplication of identical in-flight runs."""
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import numpy as np
+import pytest
+from app.image_processing.cancellation import CancellationToken, Cancelled
+from app.image_processing.processor import ImageProcessor
+from app.image_processing.singleflight import SingleFlight
+
+def wait_for(condition, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait()
+        return 42
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(flights.do, 'key', compute) for _ in range(4)]
+        wait_for(lambda: flights.stats()['shared'] == 3)
+        release.set()
+        outcomes = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in outcomes) == [False, True, True, True]
+    assert all(result == 42 for result, _ in outcomes)
+    assert flights.stats()['in_flight'] == 0
+
+def test_followers_receive_the_leaders_exception():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait()
+        raise ValueError('boom')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flights.do, 'key', fail)
+        wait_for(lambda: flights.stats()['in_flight'] == 1)
+        follower = executor.submit(flights.do, 'key', fail)
+        wait_for(lambda: flights.stats()['shared'] == 1)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+def test_follower_recomputes_when_the_leader_is_cancelled(image, monkeypatch):
+    processor = ImageProcessor()
+    pipeline = [{'id': 'blur', 'params': {'radius': 5}}, {'id': 'sharpen', 'params': {'amount': 80}}]
+    expected = ImageProcessor(cache_bytes=0).run_pipeline(image, pipeline, preview_steps=[0]).image
+    token = CancellationToken()
+    apply_step = processor._apply_step
+
+    def cancel_once_joined(step, *args):
+        # The leader gives up during its first step, once the follower waits on it
+        if args[-1] is token and step.index == 0:
+            wait_for(lambda: processor.flights.stats()['shared'] == 1)
+            token.cancel()
+        return apply_step(step, *args)
+
+    monkeypatch.setattr(processor, '_apply_step', cancel_once_joined)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(processor.run_pipeline, image, pipeline, preview_steps=[0],
+                                 image_digest='digest', cancel=token)
+        wait_for(lambda: processor.flights.stats()['in_flight'] == 1)
+        follower = executor.submit(processor.run_pipeline, image, pipeline, preview_steps=[0],
+                                   image_digest='digest')
+
+        with pytest.raises(Cancelled):
+            leader.result()
+        np.testing.assert_array_equal(follower.result().image, expected)
+
+def test_followers_replay_previews_and_final_step(image):
+    processor = ImageProcessor()
+    pipeline = [{'id': 'blur', 'params': {'radius': 5}}, {'id': 'sharpen', 'params': {'amount': 80}},
+                {'id': 'grayscale', 'params': {}}]
+    release = threading.Event()
+    steps = {'leader': [], 'follower': []}
+
+    def recorder(name):
+        def on_step(index, _result):
+            steps[name].append(index)
+            if name == 'leader':
+                release.wait()
+        return on_step
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(processor.run_pipeline, image, pipeline, preview_steps=[0],
+                                 image_digest='digest', on_step=recorder('leader'))
+        wait_for(lambda: processor.flights.stats()['in_flight'] == 1)
+        follower = executor.submit(processor.run_pipeline, image, pipeline, preview_steps=[0],
+                                   image_digest='digest', on_step=recorder('follower'))
+        wait_for(lambda: processor.flights.stats()['shared'] == 1)
+        release.set()
+        leader.result()
+        assert follower.result().shared
+
+    assert processor.flights.stats()['executions'] == 1
+    assert steps['follower'] == [0, 2]
+    assert steps['leader'][0] == 0 and steps['leader'][-1] == 2
@@ -0,0 +1,33 @@
+"""Tiled execution against whole-image runs."""
+
+import numpy as np
+import pytest
+from app.image_processing.processor import ImageProcessor
+
+def test_tiled_result_matches_the_whole_image():
+    image = np.random.default_rng(2).integers(0, 256, (150, 170, 3), dtype=np.uint8)
+    pipeline = [
+        {'id': 'blur', 'params': {'radius': 7}},
+        {'id': 'brightness', 'params': {'value': 20}},
+        {'id': 'sharpen', 'params': {'amount': 60}},
+        {'id': 'morphology', 'params': {'operation': 'dilate', 'kernel_size': 5}}
+    ]
+    processor = ImageProcessor(cache_bytes=0)
+
+    expected = processor.run_pipeline(image, pipeline).image
+    tiled = processor.process_tiled(image, pipeline, tile_size=40)
+
+    np.testing.assert_array_equal(tiled, expected)
+
+def test_writes_into_the_given_destination(image):
+    pipeline = [{'id': 'blur', 'params': {'radius': 3}}]
+    out = np.zeros_like(image)
+
+    result = ImageProcessor(cache_bytes=0).process_tiled(image, pipeline, out=out, tile_size=32)
+
+    assert result is out
+    np.testing.assert_array_equal(out, ImageProcessor(cache_bytes=0).run_pipeline(image, pipeline).image)
+
+def test_refuses_operations_that_cannot_be_tiled(image):
+    with pytest.raises(ValueError):
+        ImageProcessor(cache_bytes=0).process_tiled(image, [{'id': 'kmeans_segment', 'params': {}}])